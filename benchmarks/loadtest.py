@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from httpx import AsyncClient, ASGITransport
+
+from benchmarks.seed import SeedConfig, SeededGraph, seed_graph, drop_graph
+from ratemate_app.auth.security import create_access_token
+from ratemate_app.core.config import settings
+from ratemate_app.db.session import engine
+from ratemate_app.main import app
+
+
+class Context:
+    def __init__(self, client: AsyncClient, graph: SeededGraph, rng: random.Random, tokens: dict[int, str], ws_enabled: bool):
+        self.client = client
+        self.graph = graph
+        self.rng = rng
+        self.tokens = tokens
+        self.ws_enabled = ws_enabled
+        self._cum = list(itertools.accumulate(graph.popularity))
+
+    def user(self) -> int:
+        return self.rng.choice(self.graph.user_ids)
+
+    def popular_user(self) -> int:
+        return self.rng.choices(self.graph.user_ids, cum_weights=self._cum)[0]
+
+    def auth(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+
+async def post_read(ctx):
+    return "GET /posts/{post_id}", await ctx.client.get(f"/posts/{ctx.rng.choice(ctx.graph.post_ids)}", params={"include_rating": True})
+
+async def post_batch(ctx):
+    ids = ctx.rng.sample(ctx.graph.post_ids, min(20, len(ctx.graph.post_ids)))
+    return "GET /posts", await ctx.client.get("/posts", params={"ids": ids})
+
+async def post_feed(ctx):
+    return "GET /posts/feed", await ctx.client.get("/posts/feed", headers=ctx.auth(ctx.user()))
+
+async def post_comments(ctx):
+    return "GET /comments/by_post/{post_id}", await ctx.client.get(f"/comments/by_post/{ctx.rng.choice(ctx.graph.post_ids)}")
+
+async def rating_summary(ctx):
+    targets = [f"post:{i}" for i in ctx.rng.sample(ctx.graph.post_ids, min(10, len(ctx.graph.post_ids)))]
+    return "GET /ratings/summary", await ctx.client.get("/ratings/summary", params={"targets": targets})
+
+async def rate_post(ctx):
+    return "POST /posts/{post_id}/rate", await ctx.client.post(f"/posts/{ctx.rng.choice(ctx.graph.post_ids)}/rate", json={"score": ctx.rng.randint(1, 10)}, headers=ctx.auth(ctx.user()))
+
+async def lowkey_feed(ctx):
+    return "GET /lowkeys/feed", await ctx.client.get("/lowkeys/feed", headers=ctx.auth(ctx.user()))
+
+async def lowkey_public(ctx):
+    return "GET /lowkeys/public", await ctx.client.get("/lowkeys/public", headers=ctx.auth(ctx.user()))
+
+async def lowkey_read(ctx):
+    lowkey_id, owner_id, visibility = ctx.rng.choice(ctx.graph.lowkeys)
+    viewer_id = ctx.user() if visibility == "public" else owner_id
+    return "GET /lowkeys/{lowkey_id}", await ctx.client.get(f"/lowkeys/{lowkey_id}", headers=ctx.auth(viewer_id))
+
+async def followers_page(ctx):
+    return "GET /follows/me/followers", await ctx.client.get("/follows/me/followers", headers=ctx.auth(ctx.popular_user()))
+
+async def follow_counts(ctx):
+    return "GET /follows/{user_id}/counts", await ctx.client.get(f"/follows/{ctx.popular_user()}/counts")
+
+async def follow_suggestions(ctx):
+    return "GET /follows/suggestions", await ctx.client.get("/follows/suggestions", headers=ctx.auth(ctx.user()))
+
+async def follow_toggle(ctx):
+    user_id, target = ctx.user(), ctx.popular_user()
+    while target == user_id:
+        target = ctx.popular_user()
+    if ctx.rng.random() < 0.5:
+        return "POST /follows/{user_id}", await ctx.client.post(f"/follows/{target}", headers=ctx.auth(user_id))
+    return "DELETE /follows/{user_id}", await ctx.client.delete(f"/follows/{target}", headers=ctx.auth(user_id))
+
+async def chat_history(ctx):
+    chat_id, user_id, _ = ctx.rng.choice(ctx.graph.chats)
+    return "GET /chats/{chat_id}/messages", await ctx.client.get(f"/chats/{chat_id}/messages", headers=ctx.auth(user_id))
+
+async def chat_send(ctx):
+    chat_id, user_id, _ = ctx.rng.choice(ctx.graph.chats)
+    return "POST /chats/{chat_id}/messages", await ctx.client.post(f"/chats/{chat_id}/messages", json={"content": "benchmark message"}, headers=ctx.auth(user_id))
+
+async def chat_ws(ctx):
+    if not ctx.ws_enabled:
+        return await chat_send(ctx)
+    from httpx_ws import aconnect_ws
+
+    chat_id, user_id, _ = ctx.rng.choice(ctx.graph.chats)
+    async with aconnect_ws(f"http://bench/chats/ws/{chat_id}?token={ctx.tokens[user_id]}", ctx.client) as ws:
+        await ws.send_json({"content": "benchmark message"})
+        await ws.receive_json(timeout=10)
+    return "WS /chats/ws/{chat_id}", None
+
+
+SCENARIOS = {
+    "post_read": post_read,
+    "post_batch": post_batch,
+    "post_feed": post_feed,
+    "post_comments": post_comments,
+    "rating_summary": rating_summary,
+    "rate_post": rate_post,
+    "lowkey_feed": lowkey_feed,
+    "lowkey_public": lowkey_public,
+    "lowkey_read": lowkey_read,
+    "followers_page": followers_page,
+    "follow_counts": follow_counts,
+    "follow_suggestions": follow_suggestions,
+    "follow_toggle": follow_toggle,
+    "chat_history": chat_history,
+    "chat_send": chat_send,
+    "chat_ws": chat_ws,
+}
+
+MIXES: dict[str, dict[str, int]] = {
+    "read": {
+        "post_read": 30, "post_batch": 5, "post_feed": 20, "post_comments": 15, "rating_summary": 5,
+        "lowkey_feed": 10, "lowkey_public": 5, "lowkey_read": 5, "follow_counts": 5,
+    },
+    "social": {
+        "post_read": 20, "post_feed": 15, "post_comments": 10, "rate_post": 8, "lowkey_feed": 10,
+        "lowkey_read": 5, "followers_page": 5, "follow_suggestions": 3, "follow_toggle": 4,
+        "chat_history": 8, "chat_ws": 8, "follow_counts": 4,
+    },
+    "chat": {"chat_history": 40, "chat_send": 20, "chat_ws": 40},
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(samples: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> dict:
+    routes = {}
+    for route in sorted(samples.keys() | errors.keys()):
+        values = sorted(samples.get(route, []))
+        routes[route] = {
+            "count": len(values),
+            "errors": errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+    total = sorted(v for values in samples.values() for v in values)
+    return {
+        "routes": routes,
+        "total": {
+            "count": len(total),
+            "errors": sum(errors.values()),
+            "rps": round(len(total) / elapsed, 2),
+            "p50_ms": round(percentile(total, 50) * 1000, 3),
+            "p95_ms": round(percentile(total, 95) * 1000, 3),
+            "p99_ms": round(percentile(total, 99) * 1000, 3),
+        },
+    }
+
+def git_revision() -> dict:
+    root = Path(__file__).resolve().parents[1]
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": sha, "dirty": dirty}
+
+async def worker(ctx: Context, weights: dict[str, int], deadline: float, warmup_until: float, samples: dict, errors: dict) -> None:
+    names = list(weights)
+    cum = list(itertools.accumulate(weights.values()))
+    while time.perf_counter() < deadline:
+        name = ctx.rng.choices(names, cum_weights=cum)[0]
+        started = time.perf_counter()
+        try:
+            route, resp = await SCENARIOS[name](ctx)
+            failed = resp is not None and resp.status_code >= 400
+        except Exception:
+            route, failed = name, True
+        finished = time.perf_counter()
+        if started < warmup_until:
+            continue
+        if failed:
+            errors[route] = errors.get(route, 0) + 1
+        else:
+            samples.setdefault(route, []).append(finished - started)
+
+async def run(args) -> dict:
+    config = SeedConfig(
+        users=args.users,
+        follows_per_user=args.follows_per_user,
+        posts_per_user=args.posts_per_user,
+        chats=args.chats,
+        seed=args.seed,
+    )
+    settings.RESPONSE_CACHE_ENABLED = not args.no_response_cache
+
+    try:
+        from httpx_ws.transport import ASGIWebSocketTransport
+        transport, ws_enabled = ASGIWebSocketTransport(app=app), True
+    except ImportError:
+        print("httpx-ws is not installed, chat_ws falls back to POST /chats/{chat_id}/messages", file=sys.stderr)
+        transport, ws_enabled = ASGITransport(app=app), False
+
+    seeded_at = time.perf_counter()
+    graph = await seed_graph(config)
+    seed_seconds = time.perf_counter() - seeded_at
+    tokens = {uid: create_access_token({"sub": name}, timedelta(hours=1)) for uid, name in graph.usernames.items()}
+
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    try:
+        async with AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            started = time.perf_counter()
+            warmup_until = started + args.warmup
+            deadline = warmup_until + args.duration
+            await asyncio.gather(*(
+                worker(Context(client, graph, random.Random(args.seed * 1000 + n), tokens, ws_enabled), MIXES[args.mix], deadline, warmup_until, samples, errors)
+                for n in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - warmup_until
+    finally:
+        if not args.keep:
+            await drop_graph(graph)
+        await engine.dispose()
+
+    return {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "response_cache": settings.RESPONSE_CACHE_ENABLED,
+        "websocket": ws_enabled,
+        "seed": asdict(config),
+        "seed_seconds": round(seed_seconds, 2),
+        **summarize(samples, errors, elapsed),
+    }
+
+def compare(baseline: dict, current: dict) -> None:
+    print(f"{'route':<36} {'p50 ms':>16} {'p95 ms':>16} {'rps':>16}")
+    for route, stats in current["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        cells = []
+        for key in ("p50_ms", "p95_ms", "rps"):
+            cells.append(f"{stats[key]:.2f}" if base is None else f"{base[key]:.2f}->{stats[key]:.2f}")
+        print(f"{route:<36} {cells[0]:>16} {cells[1]:>16} {cells[2]:>16}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic social graph and load test the API in-process")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="social")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--follows-per-user", type=float, default=20)
+    parser.add_argument("--posts-per-user", type=float, default=3)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--no-response-cache", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in the database")
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="print latency deltas against an earlier report")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(run(args))
+    body = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(body + "\n")
+    else:
+        print(body)
+    if args.baseline:
+        compare(json.loads(args.baseline.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import itertools
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ratemate_app.db.session import AsyncSessionLocal, init_db
+from ratemate_app.models.chat import Chat
+from ratemate_app.models.comment import Comment
+from ratemate_app.models.follow import Follow
+from ratemate_app.models.lowkey import Lowkey
+from ratemate_app.models.message import Message
+from ratemate_app.models.post import Post
+from ratemate_app.models.rating import Rating
+from ratemate_app.models.user import User
+
+# asyncpg caps a statement at 32767 bind parameters
+_CHUNK_ROWS = 2000
+
+
+@dataclass
+class SeedConfig:
+    users: int = 1000
+    follows_per_user: float = 20
+    alpha: float = 1.1
+    posts_per_user: float = 3
+    comments_per_post: float = 4
+    ratings_per_post: float = 6
+    ratings_per_comment: float = 1
+    lowkeys_per_user: float = 0.5
+    chats: int = 200
+    messages_per_chat: int = 10
+    seed: int = 1
+
+
+@dataclass
+class SeededGraph:
+    prefix: str
+    user_ids: list[int] = field(default_factory=list)
+    usernames: dict[int, str] = field(default_factory=dict)
+    post_ids: list[int] = field(default_factory=list)
+    comment_ids: list[int] = field(default_factory=list)
+    lowkeys: list[tuple[int, int, str]] = field(default_factory=list)
+    chats: list[tuple[int, int, int]] = field(default_factory=list)
+    popularity: list[float] = field(default_factory=list)
+
+
+def zipf_weights(n: int, alpha: float) -> list[float]:
+    return [1.0 / (rank + 1) ** alpha for rank in range(n)]
+
+def _poisson_like(rng: random.Random, mean: float) -> int:
+    if mean <= 0:
+        return 0
+    return max(0, round(rng.expovariate(1.0 / mean)))
+
+def _pick_distinct(rng: random.Random, population: list[int], cum_weights: list[float], k: int, exclude: int | None = None) -> list[int]:
+    k = min(k, len(population) - (exclude is not None))
+    picked: dict[int, None] = {}
+    while len(picked) < k:
+        for value in rng.choices(population, cum_weights=cum_weights, k=(k - len(picked)) * 2):
+            if value != exclude:
+                picked[value] = None
+    return list(picked)[:k]
+
+async def _insert_returning(db, model, rows: list[dict], column) -> list[int]:
+    ids: list[int] = []
+    for start in range(0, len(rows), _CHUNK_ROWS):
+        q = await db.execute(pg_insert(model).values(rows[start:start + _CHUNK_ROWS]).returning(column))
+        ids.extend(q.scalars().all())
+    return ids
+
+async def seed_graph(config: SeedConfig) -> SeededGraph:
+    await init_db()
+    rng = random.Random(config.seed)
+    graph = SeededGraph(prefix=f"bench_{uuid.uuid4().hex[:8]}")
+    now = datetime.now(timezone.utc)
+
+    async with AsyncSessionLocal() as db:
+        user_rows = [{
+            "username": f"{graph.prefix}_{i}",
+            "email": f"{graph.prefix}_{i}@bench.example.com",
+            "hashed_password": None,
+        } for i in range(config.users)]
+        graph.user_ids = await _insert_returning(db, User, user_rows, User.id)
+        graph.usernames = {uid: row["username"] for uid, row in zip(graph.user_ids, user_rows)}
+
+        # popularity is zipf over a shuffled ranking, so hubs are spread across ids
+        ranked = graph.user_ids[:]
+        rng.shuffle(ranked)
+        weights = dict(zip(ranked, zipf_weights(len(ranked), config.alpha)))
+        graph.popularity = [weights[uid] for uid in graph.user_ids]
+        cum = list(itertools.accumulate(graph.popularity))
+
+        follow_rows = []
+        for uid in graph.user_ids:
+            degree = min(len(graph.user_ids) - 1, max(1, round(config.follows_per_user * rng.paretovariate(2.0) / 2)))
+            for target in _pick_distinct(rng, graph.user_ids, cum, degree, exclude=uid):
+                follow_rows.append({"follower_id": uid, "followed_id": target})
+        await _insert_returning(db, Follow, follow_rows, Follow.id)
+        await db.execute(
+            text("UPDATE users SET follower_count = f.n FROM (SELECT followed_id, count(*) AS n FROM follows WHERE followed_id = ANY(:ids) GROUP BY followed_id) f WHERE users.id = f.followed_id"),
+            {"ids": graph.user_ids},
+        )
+        await db.execute(
+            text("UPDATE users SET following_count = f.n FROM (SELECT follower_id, count(*) AS n FROM follows WHERE follower_id = ANY(:ids) GROUP BY follower_id) f WHERE users.id = f.follower_id"),
+            {"ids": graph.user_ids},
+        )
+
+        post_rows = []
+        for uid in graph.user_ids:
+            for n in range(_poisson_like(rng, config.posts_per_user)):
+                post_rows.append({"owner_id": uid, "title": f"post {n}", "content": "benchmark post " * rng.randint(1, 20), "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 14))})
+        graph.post_ids = await _insert_returning(db, Post, post_rows, Post.id)
+
+        comment_rows = []
+        for post_id in graph.post_ids:
+            for _ in range(_poisson_like(rng, config.comments_per_post)):
+                comment_rows.append({"user_id": rng.choices(graph.user_ids, cum_weights=cum)[0], "post_id": post_id, "content": "benchmark comment " * rng.randint(1, 5)})
+        graph.comment_ids = await _insert_returning(db, Comment, comment_rows, Comment.id)
+
+        rating_rows = []
+        for column, ids, mean in (("post_id", graph.post_ids, config.ratings_per_post), ("comment_id", graph.comment_ids, config.ratings_per_comment)):
+            for target in ids:
+                for rater in rng.sample(graph.user_ids, min(len(graph.user_ids), _poisson_like(rng, mean))):
+                    rating_rows.append({"user_id": rater, "post_id": None, "comment_id": None, column: target, "score": rng.randint(0, 10)})
+        await _insert_returning(db, Rating, rating_rows, Rating.id)
+
+        lowkey_rows = []
+        for uid in graph.user_ids:
+            for n in range(_poisson_like(rng, config.lowkeys_per_user)):
+                created_at = now - timedelta(minutes=rng.randint(0, 60 * 20))
+                lowkey_rows.append({
+                    "owner_id": uid,
+                    "title": f"lowkey {n}",
+                    "media_url": f"https://bench.example.com/{graph.prefix}/{uid}/{n}.jpg",
+                    "media_type": "image",
+                    "visibility": rng.choice(("public", "followers")),
+                    "created_at": created_at,
+                    "expires_at": created_at + timedelta(hours=24),
+                })
+        lowkey_ids = await _insert_returning(db, Lowkey, lowkey_rows, Lowkey.id)
+        graph.lowkeys = [(lowkey_id, row["owner_id"], row["visibility"]) for lowkey_id, row in zip(lowkey_ids, lowkey_rows)]
+
+        pairs: set[tuple[int, int]] = set()
+        while len(pairs) < min(config.chats, len(graph.user_ids) * (len(graph.user_ids) - 1) // 2):
+            a, b = rng.sample(graph.user_ids, 2)
+            pairs.add((min(a, b), max(a, b)))
+        pairs_list = sorted(pairs)
+        chat_ids = await _insert_returning(db, Chat, [{"user1_id": a, "user2_id": b} for a, b in pairs_list], Chat.id)
+        graph.chats = [(chat_id, a, b) for chat_id, (a, b) in zip(chat_ids, pairs_list)]
+
+        message_rows = [{
+            "chat_id": chat_id,
+            "sender_id": rng.choice((a, b)),
+            "content": f"message {n}",
+        } for chat_id, a, b in graph.chats for n in range(config.messages_per_chat)]
+        await _insert_returning(db, Message, message_rows, Message.id)
+
+        await db.commit()
+    return graph
+
+async def drop_graph(graph: SeededGraph) -> None:
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(graph.user_ids), _CHUNK_ROWS):
+            await db.execute(delete(User).where(User.id.in_(graph.user_ids[start:start + _CHUNK_ROWS])))
+        await db.commit()
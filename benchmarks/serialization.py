@@ -0,0 +1,101 @@
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from pydantic import TypeAdapter
+
+from ratemate_app.core.responses import ORJSONResponse
+from ratemate_app.schemas.comment import CommentRead
+from ratemate_app.schemas.lowkey import LowkeyRead
+from ratemate_app.schemas.media import MediaRead
+
+
+def lowkey_rows(n: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": i,
+        "owner_id": i % 97,
+        "title": f"lowkey {i}",
+        "media_url": f"https://example.blob.core.windows.net/media/blobs/{i:064x}",
+        "media_type": "image",
+        "created_at": now - timedelta(minutes=i),
+        "expires_at": now + timedelta(hours=24) - timedelta(minutes=i),
+        "view_count": i * 3,
+    } for i in range(n)]
+
+
+def comment_rows(n: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    out = []
+    for i in range(n):
+        media = [{
+            "id": i * 2 + j,
+            "post_id": None,
+            "comment_id": i,
+            "url": f"https://example.blob.core.windows.net/media/blobs/{i * 2 + j:064x}",
+            "media_type": "image",
+            "created_at": now,
+        } for j in range(i % 3)]
+        out.append({
+            "id": i,
+            "user_id": i % 41,
+            "post_id": 1,
+            "content": "nice post " * 5,
+            "created_at": now - timedelta(seconds=i),
+            "parent_id": None,
+            "media": media,
+            "media_urls": [m["url"] for m in media],
+        })
+    return out
+
+
+LOWKEY_LIST = TypeAdapter(list[LowkeyRead])
+COMMENT_LIST = TypeAdapter(list[CommentRead])
+
+
+def validated_lowkeys(rows: list[dict]) -> bytes:
+    items = [LowkeyRead.model_validate(dict(row)) for row in rows]
+    return LOWKEY_LIST.dump_json(LOWKEY_LIST.validate_python(items))
+
+
+def validated_comments(rows: list[dict]) -> bytes:
+    items = []
+    for row in rows:
+        media_reads = [MediaRead.model_validate(m) for m in row["media"]]
+        items.append(CommentRead.model_validate({**row, "media": media_reads}))
+    return COMMENT_LIST.dump_json(COMMENT_LIST.validate_python(items))
+
+
+def direct(rows: list[dict]) -> bytes:
+    return ORJSONResponse([dict(row) for row in rows]).body
+
+
+def bench(fn, rows: list[dict], repeat: int) -> float:
+    fn(rows)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best / len(rows) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-item JSON serialization cost of list endpoints")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    cases = [
+        ("lowkeys", lowkey_rows(args.items), validated_lowkeys),
+        ("comments", comment_rows(args.items), validated_comments),
+    ]
+    print(f"{'endpoint':<10} {'validated us/item':>18} {'direct us/item':>15} {'speedup':>8}")
+    for name, rows, validated in cases:
+        before = bench(validated, rows, args.repeat)
+        after = bench(direct, rows, args.repeat)
+        print(f"{name:<10} {before:>18.2f} {after:>15.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,36 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.security import HTTPBasic
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from ratemate_app.db.session import get_db
 from ratemate_app.services.admin import require_admin
+from ratemate_app.core.metrics import render_metrics
+from ratemate_app.core.profiling import profile_buffer
 
 router = APIRouter()
 basic = HTTPBasic()
 
 @router.get("/ping", dependencies=[Depends(require_admin)])
-async def admin_ping(db: AsyncSession = Depends(get_db)):
+async def admin_ping():
     return {"success": True}
 
+@router.get("/metrics", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def admin_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return [p.summary() for p in profile_buffer.list()]
 
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: int, format: str = Query("text", pattern="^(text|html)$")):
+    profile = profile_buffer.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "html":
+        return HTMLResponse(profile.render("html"))
+    return PlainTextResponse(profile.render("text"))
+
+@router.delete("/profiles", dependencies=[Depends(require_admin)])
+async def clear_profiles():
+    profile_buffer.clear()
+    return {"success": True}
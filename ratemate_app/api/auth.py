@@ -21,16 +21,16 @@ router = APIRouter()
 @router.post("/login", response_model=Token)
 async def login_for_access_tokens(
     user_login: UserLogin,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user_agent: Optional[str] = Header(None)
 ):
-    logger.info(f"Login attempt for user: {user_login.username}")
+    logger.info("Login attempt for user: %s", user_login.username)
 
     user = await UserService.authenticate_user(
         db, user_login.username, user_login.password
     )
     if not user:
-        logger.warning(f"Failed login attempt for user {user_login.username}")
+        logger.warning("Failed login attempt for user %s", user_login.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -42,7 +42,7 @@ async def login_for_access_tokens(
         expires_delta = access_token_expires
     )
 
-    logger.info(f"Successful login for user: {user.username}")
+    logger.info("Successful login for user: %s", user.username)
 
     return {
         "access_token": access_token,
@@ -51,12 +51,12 @@ async def login_for_access_tokens(
     
     
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    logger.info(f"Registration attempt for user: {user.username}")
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db, scope="function")):
+    logger.info("Registration attempt for user: %s", user.username)
 
     db_user = await UserService.get_user_by_username(db, user.username)
     if db_user:
-        logger.warning(f"Registration attempt with existing username: {user.username}")
+        logger.warning("Registration attempt with existing username: %s", user.username)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken",
@@ -65,7 +65,7 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     db_user = await UserService.get_user_by_email(db, email=user.email)
 
     if db_user:
-        logger.warning(f"Registration attempt with existing email: {user.email}")
+        logger.warning("Registration attempt with existing email: %s", user.email)
         raise HTTPException(
              status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
@@ -79,13 +79,13 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
         expires_delta=access_token_expires
     )
 
-    logger.info(f"Successful registration for user: {user.username}")
+    logger.info("Successful registration for user: %s", user.username)
     return {"access_token": access_token,
             "token_type": "bearer"}
 
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def delete_me(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def delete_me(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -108,7 +108,7 @@ async def delete_me(authorization: Optional[str] = Header(None), db: AsyncSessio
     return
 
 @router.post("/me/change_username", response_model=Token, dependencies=[Depends(security)])
-async def change_username(req: ChangeUsernameRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def change_username(req: ChangeUsernameRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -138,7 +138,7 @@ async def change_username(req: ChangeUsernameRequest, authorization: Optional[st
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/me/change_email", status_code=status.HTTP_200_OK, dependencies=[Depends(security)])
-async def change_email(req: ChangeEmailRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def change_email(req: ChangeEmailRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -168,7 +168,7 @@ async def change_email(req: ChangeEmailRequest, authorization: Optional[str] = H
 
 
 @router.post("/me/profile", status_code=status.HTTP_200_OK, dependencies=[Depends(security)])
-async def update_profile(req: ProfileUpdateRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def update_profile(req: ProfileUpdateRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -191,7 +191,7 @@ async def update_profile(req: ProfileUpdateRequest, authorization: Optional[str]
 
 
 @router.get("/avatar/{username}")
-async def get_user_avatar(username: str, db: AsyncSession = Depends(get_db)):
+async def get_user_avatar(username: str, db: AsyncSession = Depends(get_db, scope="function")):
     user = await UserService.get_user_by_username(db, username)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -201,7 +201,7 @@ async def get_user_avatar(username: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/me/avatar", status_code=status.HTTP_201_CREATED, dependencies=[Depends(security)])
-async def upload_my_avatar(file: UploadFile = File(...), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def upload_my_avatar(file: UploadFile = File(...), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -219,18 +219,18 @@ async def upload_my_avatar(file: UploadFile = File(...), authorization: Optional
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    from ratemate_app.services.media import upload_user_avatar, delete_user_avatar_blob
+    from ratemate_app.services.media import acquire_blob, release_blob
 
-    if user.avatar_url:
-        await delete_user_avatar_blob(user.avatar_url)
-    url, media_type = await upload_user_avatar(user.id, file)
+    old_url = user.avatar_url
+    url, media_type = await acquire_blob(db, file)
+    await release_blob(db, old_url)
     await UserService.update_avatar(db, user, url, media_type)
 
     return {"url": url, "media_type": media_type}
 
 
 @router.put("/me/avatar", status_code=status.HTTP_200_OK, dependencies=[Depends(security)])
-async def update_avatar(file: UploadFile = File(...), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def update_avatar(file: UploadFile = File(...), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -248,18 +248,18 @@ async def update_avatar(file: UploadFile = File(...), authorization: Optional[st
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    from ratemate_app.services.media import upload_user_avatar, delete_user_avatar_blob
+    from ratemate_app.services.media import acquire_blob, release_blob
 
-    if user.avatar_url:
-        await delete_user_avatar_blob(user.avatar_url)
-    url, media_type = await upload_user_avatar(user.id, file)
+    old_url = user.avatar_url
+    url, media_type = await acquire_blob(db, file)
+    await release_blob(db, old_url)
     await UserService.update_avatar(db, user, url, media_type)
 
     return {"url": url, "media_type": media_type}
 
 
 @router.delete("/me/avatar", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def delete_my_avatar(file: UploadFile = File(...), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def delete_my_avatar(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -277,11 +277,9 @@ async def delete_my_avatar(file: UploadFile = File(...), authorization: Optional
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    from ratemate_app.services.media import delete_user_avatar_blob
+    from ratemate_app.services.media import release_blob
 
-    if user.avatar_url:
-        await delete_user_avatar_blob(user.avatar_url)
-    url, media_type = await upload_user_avatar(user.id, file)
-    await UserService.clear_avatar(db, user, url, media_type)
+    await release_blob(db, user.avatar_url)
+    await UserService.clear_avatar(db, user)
 
     return 
\ No newline at end of file
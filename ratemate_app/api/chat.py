@@ -2,8 +2,11 @@ from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, We
 from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Set
+import math
 
-from ratemate_app.db.session import get_db, AsyncSessionLocal
+from ratemate_app.db.session import get_db, commit, on_commit, AsyncSessionLocal
+from ratemate_app.core.rate_limit import check_rate_limit
+from ratemate_app.core.responses import format_datetime
 from ratemate_app.auth.security import decode_access_token
 from ratemate_app.services.user import UserService
 from ratemate_app.services.chat import get_or_create_chat, send_message, list_recent_messages, redact_message_content
@@ -16,8 +19,25 @@ router = APIRouter()
 security = HTTPBearer()
 _chat_conns: Dict[int, set[WebSocket]] = {}
 
+async def close_chat_connections(code: int = 1001) -> None:
+    for conns in list(_chat_conns.values()):
+        for ws in list(conns):
+            try:
+                await ws.close(code=code)
+            except Exception:
+                pass
+            conns.discard(ws)
+
+async def _broadcast(chat_id: int, data: dict) -> None:
+    conns = _chat_conns.get(chat_id, set())
+    for ws in list(conns):
+        try:
+            await ws.send_json(data)
+        except Exception:
+            conns.discard(ws)
+
 @router.post("/with/{user_id}", response_model=ChatRead, dependencies=[Depends(security)], status_code=status.HTTP_201_CREATED)
-async def start_or_get_chat(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def start_or_get_chat(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -51,7 +71,7 @@ async def start_or_get_chat(user_id: int, authorization: Optional[str] = Header(
 
 
 @router.post("/{chat_id}/messages", response_model=MessageRead, dependencies=[Depends(security)], status_code=status.HTTP_201_CREATED)
-async def send_chat_message(chat_id: int, payload: MessageCreate, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def send_chat_message(chat_id: int, payload: MessageCreate, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -81,20 +101,14 @@ async def send_chat_message(chat_id: int, payload: MessageCreate, authorization:
     
     msg = await send_message(db, chat_id, user.id, payload.content)
 
-    conns = _chat_conns.get(chat_id, set())
-    data = {"id": msg.id, "chat_id": msg.chat_id, "sender_id": msg.sender_id, "content": msg.content, "created_at": msg.created_at.isoformat()}
-
-    for ws in list(conns):
-        try:
-            await ws.send_json(data)
-        except:
-            conns.discard(ws)
+    data = {"id": msg.id, "chat_id": msg.chat_id, "sender_id": msg.sender_id, "content": msg.content, "created_at": format_datetime(msg.created_at)}
+    on_commit(db, _broadcast, chat_id, data)
 
     return msg
 
 
 @router.get("/{chat_id}/messages", response_model=list[MessageRead], dependencies=[Depends(security)])
-async def get_recent_chat_messages(chat_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db), limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)):
+async def get_recent_chat_messages(chat_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function"), limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -125,7 +139,7 @@ async def get_recent_chat_messages(chat_id: int, authorization: Optional[str] =
 
 
 @router.delete("/messages/{message_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def redact_message(message_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def redact_message(message_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -155,19 +169,13 @@ async def redact_message(message_id: int, authorization: Optional[str] = Header(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not the author")
     
     await redact_message_content(db, message_id, user.id)
-    conns = _chat_conns.get(chat.id if hasattr(chat, 'id') else msg.chat_id, set())
 
     data = {"id": msg.id,
             "chat_id": msg.chat_id ,
             "sender_id": msg.sender_id ,
             "content": "",
-            "created_at": msg.created_at.isoformat()}
-    
-    for ws in list(conns):
-        try:
-            await ws.send_json(data)
-        except:
-            conns.discard()
+            "created_at": format_datetime(msg.created_at)}
+    on_commit(db, _broadcast, chat.id, data)
     return
 
 
@@ -204,14 +212,15 @@ async def websocket_chat(chat_id: int, websocket: WebSocket, token: str):
                 if not isinstance(content, str) or not content.strip():
                     continue
 
+                retry_after = await check_rate_limit("chat_send", f"user:{user.username}")
+                if retry_after > 0:
+                    await websocket.send_json({"error": "rate_limited", "retry_after": math.ceil(retry_after)})
+                    continue
+
                 msg = await send_message(db, chat_id, user.id, content)
-                data ={"id": msg.id, "chat_id": msg.chat_id, "sender_id": msg.sender_id, "content": msg.content, "created_at": msg.created_at.isoformat()}
-                
-                for ws in list(conns):
-                    try:
-                        await ws.send_json(data)
-                    except:
-                        conns.discard(ws)
+                await commit(db)
+                data ={"id": msg.id, "chat_id": msg.chat_id, "sender_id": msg.sender_id, "content": msg.content, "created_at": format_datetime(msg.created_at)}
+                await _broadcast(chat_id, data)
         except WebSocketDisconnect:
             pass
         finally:
@@ -4,11 +4,13 @@ from typing import Optional
 from fastapi.security import HTTPBearer
 
 from ratemate_app.db.session import get_db
-from ratemate_app.schemas.comment import CommentCreate, CommentRead, RatingRequest, RatingResponse
+from ratemate_app.schemas.comment import CommentCreate, CommentRead, CommentWithRating, RatingRequest, RatingResponse
 from ratemate_app.schemas.media import MediaRead
 from ratemate_app.auth.security import decode_access_token
 from ratemate_app.services.user import UserService
-from ratemate_app.services.comment import create_comment, list_post_comments
+from ratemate_app.services.comment import create_comment, list_post_comment_rows, get_comments_by_ids
+from ratemate_app.core.responses import ORJSONResponse
+from ratemate_app.core.query_detector import query_budget
 from ratemate_app.services.ratings import set_comment_rating, get_comment_rating_summary
 from ratemate_app.models.post import Post
 from ratemate_app.models.comment import Comment
@@ -27,7 +29,7 @@ async def create_comment_endpoint(
     parent_id: Optional[int] = Form(None),
     files: list[UploadFile] | None = File(None),
     authorization: Optional[str] = Header(None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
 ):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
@@ -82,48 +84,52 @@ async def create_comment_endpoint(
         })
     
 
+@router.get("", response_model=list[CommentWithRating])
+@query_budget(3)
+async def get_comments_batch(ids: list[int] = Query(..., max_length=100), db: AsyncSession = Depends(get_db, scope="function")):
+    from ratemate_app.services.media import list_media_rows_for_comments
+    from ratemate_app.services.ratings import get_comment_rating_summaries
+
+    rows = await get_comments_by_ids(db, ids)
+    comment_ids = [row["id"] for row in rows]
+    media_by_comment = await list_media_rows_for_comments(db, comment_ids)
+    summaries = await get_comment_rating_summaries(db, comment_ids)
+
+    out: list[dict] = []
+    for row in rows:
+        medias = media_by_comment.get(row["id"], [])
+        summary = summaries[row["id"]]
+        out.append({
+            **row,
+            "media": medias,
+            "media_urls": [m["url"] for m in medias],
+            "rating_average": summary["average"],
+            "rating_count": summary["count"],
+        })
+    return ORJSONResponse(out)
+
+
 @router.get("/by_post/{post_id}", response_model=list[CommentRead])
+@query_budget(2)
 async def get_comments_for_post(
     post_id: int,
     include_media: bool = Query(True),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0)
 ):
-    items = await list_post_comments(db, post_id, limit, offset)
+    rows = await list_post_comment_rows(db, post_id, limit, offset)
 
-    if not include_media:
-        medias = await list_comment_media(db, comment.id)
-        
-        return [ CommentRead.model_validate({
-                "id": comment.id,
-                "user_id": comment.user_id,
-                "post_id": comment.post_id,
-                "content": comment.content,
-                "created_at": comment.created_at,
-                "parent_id": comment.parent_id,
-                "media": [],
-                "media_urls": []
-            }) for comment in items
-        ]
-    
-    from ratemate_app.services.media import list_comment_media 
-    result: list[CommentRead] = []
+    media_by_comment: dict[int, list[dict]] = {}
+    if include_media:
+        from ratemate_app.services.media import list_media_rows_for_comments
+        media_by_comment = await list_media_rows_for_comments(db, [row["id"] for row in rows])
 
-    for comment in items:
-        medias = await list_comment_media(db, comment.id)
-        media_reads = [MediaRead.model_validate(m, from_attributes=True) for m in medias]
-        result.append(CommentRead.model_validate({
-                "id": comment.id,
-                "user_id": comment.user_id,
-                "post_id": comment.post_id,
-                "content": comment.content,
-                "created_at": comment.created_at,
-                "parent_id": comment.parent_id,
-                "media": media_reads,
-                "media_urls": [mr.url for mr in media_reads]
-            }))
-    return result
+    out: list[dict] = []
+    for row in rows:
+        medias = media_by_comment.get(row["id"], [])
+        out.append({**row, "media": medias, "media_urls": [m["url"] for m in medias]})
+    return ORJSONResponse(out)
 
 @router.post("/{comment_id}/rate", 
              status_code=status.HTTP_201_CREATED, 
@@ -134,7 +140,7 @@ async def rate_comment(
     comment_id: int,
     rating: RatingRequest,
     authorization: Optional[str] = Header(None),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db, scope="function")
     ):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
@@ -162,7 +168,7 @@ async def rate_comment(
 
 
 @router.get("/{comment_id}", response_model=CommentRead)
-async def get_comment(comment_id: int, include_media: bool = Query(True), db: AsyncSession = Depends(get_db)):
+async def get_comment(comment_id: int, include_media: bool = Query(True), db: AsyncSession = Depends(get_db, scope="function")):
     comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
@@ -197,7 +203,7 @@ async def get_comment(comment_id: int, include_media: bool = Query(True), db: As
 
 
 @router.post("/{comment_id}/media", response_model=list[MediaRead], status_code=status.HTTP_201_CREATED, dependencies=[Depends(security)])
-async def upload_comment_media_endpoint(comment_id: int, files: list[UploadFile] | None = File(None), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def upload_comment_media_endpoint(comment_id: int, files: list[UploadFile] | None = File(None), authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -236,13 +242,13 @@ async def upload_comment_media_endpoint(comment_id: int, files: list[UploadFile]
 
 
 @router.get("/{comment_id}/rating", response_model=dict, summary="Get comment rating summary")
-async def get_comment_rating(comment_id: int, db: AsyncSession = Depends(get_db)):
+async def get_comment_rating(comment_id: int, db: AsyncSession = Depends(get_db, scope="function")):
     summary = await get_comment_rating_summary(db, comment_id)
     return summary
 
 
 @router.delete("/{comment_id}/rating", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def delete_comment_rating_endpoint(comment_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def delete_comment_rating_endpoint(comment_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -270,7 +276,7 @@ async def delete_comment_rating_endpoint(comment_id: int, authorization: Optiona
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def delete_comment_endpoint(comment_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def delete_comment_endpoint(comment_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
 from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
@@ -6,16 +6,70 @@ from typing import Optional
 from ratemate_app.db.session import get_db
 from ratemate_app.auth.security import decode_access_token
 from ratemate_app.services.user import UserService
-from ratemate_app.services.follow import follow_user, unfollow_user, list_following, list_followers, list_common_following
-from ratemate_app.schemas.user import UserSummary
+from ratemate_app.services.follow import follow_user, unfollow_user, follow_users, unfollow_users, list_following, list_followers, list_common_following, list_follow_suggestions, get_follow_counts
+from ratemate_app.schemas.user import UserSummary, UserSummaryPage, FollowCounts, FollowSuggestion, BulkFollowRequest, BulkFollowResult
 from ratemate_app.models.user import User
 
 router = APIRouter()
 
 security = HTTPBearer()
 
+@router.post("/bulk", response_model=list[BulkFollowResult], dependencies=[Depends(security)])
+async def follow_bulk(body: BulkFollowRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
+    
+    token = authorization.split(" ", 1)[1]
+    try:
+        payload = decode_access_token(token)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token")
+    
+    username = payload.get("sub")
+    if not username:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token Payload")
+        
+    me = await UserService.get_user_by_username(db, username)
+    if not me:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    try:
+        outcomes = await follow_users(db, me.id, body.user_ids)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many targets")
+
+    return [{"user_id": uid, "status": outcome} for uid, outcome in outcomes.items()]
+
+
+@router.delete("/bulk", response_model=list[BulkFollowResult], dependencies=[Depends(security)])
+async def unfollow_bulk(body: BulkFollowRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
+    
+    token = authorization.split(" ", 1)[1]
+    try:
+        payload = decode_access_token(token)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token")
+    
+    username = payload.get("sub")
+    if not username:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token Payload")
+        
+    me = await UserService.get_user_by_username(db, username)
+    if not me:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    try:
+        outcomes = await unfollow_users(db, me.id, body.user_ids)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many targets")
+
+    return [{"user_id": uid, "status": outcome} for uid, outcome in outcomes.items()]
+
+
 @router.post("/{user_id}", status_code=status.HTTP_201_CREATED, dependencies=[Depends(security)])
-async def follow(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def follow(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -48,7 +102,7 @@ async def follow(user_id: int, authorization: Optional[str] = Header(None), db:
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_200_OK, dependencies=[Depends(security)])
-async def unfollow(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def unfollow(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -71,8 +125,8 @@ async def unfollow(user_id: int, authorization: Optional[str] = Header(None), db
     return {"success": True}
 
 
-@router.get("/me/following", response_model=list[UserSummary], dependencies=[Depends(security)])
-async def get_my_following(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+@router.get("/me/following", response_model=UserSummaryPage, dependencies=[Depends(security)])
+async def get_my_following(authorization: Optional[str] = Header(None), limit: int = Query(50, ge=1, le=200), cursor: Optional[int] = Query(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -90,12 +144,12 @@ async def get_my_following(authorization: Optional[str] = Header(None), db: Asyn
     if not me:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    users = await list_following(db, me.id)
-    return users
+    users, next_cursor = await list_following(db, me.id, limit, cursor)
+    return {"items": [{"id": uid, "username": uname} for (uid, uname) in users], "next_cursor": next_cursor}
 
 
-@router.get("/me/followers", response_model=list[UserSummary], dependencies=[Depends(security)])
-async def get_my_followers(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+@router.get("/me/followers", response_model=UserSummaryPage, dependencies=[Depends(security)])
+async def get_my_followers(authorization: Optional[str] = Header(None), limit: int = Query(50, ge=1, le=200), cursor: Optional[int] = Query(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -113,12 +167,12 @@ async def get_my_followers(authorization: Optional[str] = Header(None), db: Asyn
     if not me:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    users = await list_followers(db, me.id)
-    return users
+    users, next_cursor = await list_followers(db, me.id, limit, cursor)
+    return {"items": [{"id": uid, "username": uname} for (uid, uname) in users], "next_cursor": next_cursor}
 
 
 @router.get("/common_with/{user_id}", response_model=list[UserSummary], dependencies=[Depends(security)])
-async def get_common_following(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def get_common_following(user_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -141,4 +195,37 @@ async def get_common_following(user_id: int, authorization: Optional[str] = Head
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target not found")
 
     users = await list_common_following(db, me.id, user_id)
-    return users
\ No newline at end of file
+    return [{"id": uid, "username": uname} for (uid, uname) in users]
+
+
+@router.get("/suggestions", response_model=list[FollowSuggestion], dependencies=[Depends(security)])
+async def get_follow_suggestions(authorization: Optional[str] = Header(None), limit: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_db, scope="function")):
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
+    
+    token = authorization.split(" ", 1)[1]
+    try:
+        payload = decode_access_token(token)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token")
+    
+    username = payload.get("sub")
+    if not username:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token Payload")
+        
+    me = await UserService.get_user_by_username(db, username)
+    if not me:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    rows = await list_follow_suggestions(db, me.id, limit)
+    return [{"id": uid, "username": uname, "mutual_count": n} for (uid, uname, n) in rows]
+
+
+@router.get("/{user_id}/counts", response_model=FollowCounts)
+async def get_user_follow_counts(user_id: int, db: AsyncSession = Depends(get_db, scope="function")):
+    counts = await get_follow_counts(db, user_id)
+    if not counts:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    follower_count, following_count = counts
+    return {"follower_count": follower_count, "following_count": following_count}
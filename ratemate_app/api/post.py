@@ -4,12 +4,15 @@ from typing import Optional
 from fastapi.security import HTTPBearer
 
 from ratemate_app.db.session import get_db
-from ratemate_app.schemas.post import PostCreate, PostRead
+from ratemate_app.schemas.post import PostCreate, PostRead, PostFeedItem, PostWithRating
 from ratemate_app.schemas.comment import RatingRequest, RatingResponse
 from ratemate_app.schemas.media import MediaRead
 from ratemate_app.auth.security import decode_access_token
 from ratemate_app.services.user import UserService
-from ratemate_app.services.post import create_post
+from ratemate_app.services.post import create_post, get_posts_by_ids, get_post_for_read
+from ratemate_app.core.responses import ORJSONResponse
+from ratemate_app.core.query_detector import query_budget
+from ratemate_app.services.feed import get_home_feed
 from ratemate_app.models.post import Post
 
 router = APIRouter()
@@ -21,7 +24,7 @@ security = HTTPBearer()
 async def create_post_endpoint(
     payload: PostCreate,
     authorization: Optional[str] = Header(None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
 ):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
@@ -46,13 +49,60 @@ async def create_post_endpoint(
     post = await create_post(db, owner_id=user.id, data=payload)
 
     return post
+
+
+@router.get("", response_model=list[PostWithRating])
+@query_budget(3)
+async def get_posts_batch(ids: list[int] = Query(..., max_length=100), db: AsyncSession = Depends(get_db, scope="function")):
+    from ratemate_app.services.media import list_media_rows_for_posts
+    from ratemate_app.services.ratings import get_post_rating_summaries
+
+    rows = await get_posts_by_ids(db, ids)
+    post_ids = [row["id"] for row in rows]
+    media_by_post = await list_media_rows_for_posts(db, post_ids)
+    summaries = await get_post_rating_summaries(db, post_ids)
+
+    out: list[dict] = []
+    for row in rows:
+        medias = media_by_post.get(row["id"], [])
+        summary = summaries[row["id"]]
+        out.append({
+            **row,
+            "media": medias,
+            "media_urls": [m["url"] for m in medias],
+            "rating_average": summary["average"],
+            "rating_count": summary["count"],
+        })
+    return ORJSONResponse(out)
+
+
+@router.get("/feed", response_model=list[PostFeedItem], dependencies=[Depends(security)])
+async def get_post_feed(authorization: Optional[str] = Header(None), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0), db: AsyncSession = Depends(get_db, scope="function")):
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
+    
+    token = authorization.split(" ", 1)[1]
+    try:
+        payload_jwt = decode_access_token(token)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token")
+    
+    username = payload_jwt.get("sub")
+    if not username:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+    
+    user = await UserService.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    return await get_home_feed(db, user.id, limit, offset)
         
 
 @router.post("/{post_id}/rate",
              status_code=status.HTTP_201_CREATED,
              response_model=RatingResponse,
              dependencies=[Depends(security)])
-async def rate_post(post_id: int, rating: RatingRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def rate_post(post_id: int, rating: RatingRequest, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -83,35 +133,31 @@ async def rate_post(post_id: int, rating: RatingRequest, authorization: Optional
     return {"success": True}
 
 
-@router.get("/{post_id}", response_model=PostRead)
-async def get_post(post_id: int, include_media: bool = Query(True), db: AsyncSession = Depends(get_db)):
-    post = await db.get(Post, post_id)
-    if not post:
+@router.get("/{post_id}", response_model=PostWithRating, response_model_exclude_unset=True)
+@query_budget(1)
+async def get_post(post_id: int, include_media: bool = Query(True), include_rating: bool = Query(False), db: AsyncSession = Depends(get_db, scope="function")):
+    found = await get_post_for_read(db, post_id, include_media, include_rating)
+    if not found:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    
-    if include_media:
-        return PostRead.model_validate({
-            "id": post.id,
-            "owner_id": post.owner_id,
-            "title": post.title,
-            "content": post.content,
-            "created_at": post.created_at,
-            "media": media_reads,
-            "media_urls": [mr.url for mr in media_reads]
-        })
-    else:
-        return PostRead.model_validate({
-            "id": post.id,
-            "owner_id": post.owner_id,
-            "title": post.title,
-            "content": post.content,
-            "created_at": post.created_at,
-            "media": [],
-            "media_urls": []
-        })
+
+    post, rating_average, rating_count = found
+    media_reads = [MediaRead.model_validate(m, from_attributes=True) for m in post.media] if include_media else []
+    data = {
+        "id": post.id,
+        "owner_id": post.owner_id,
+        "title": post.title,
+        "content": post.content,
+        "created_at": post.created_at,
+        "media": media_reads,
+        "media_urls": [mr.url for mr in media_reads]
+    }
+    if include_rating:
+        data["rating_average"] = rating_average
+        data["rating_count"] = rating_count
+    return PostWithRating.model_validate(data)
 
 @router.get("/{post_id}/rating")
-async def get_post_rating(post_id: int, db: AsyncSession = Depends(get_db)):
+async def get_post_rating(post_id: int, db: AsyncSession = Depends(get_db, scope="function")):
     from ratemate_app.services.ratings import get_post_rating_summary
 
     summary = await get_post_rating_summary(db, post_id)
@@ -120,7 +166,7 @@ async def get_post_rating(post_id: int, db: AsyncSession = Depends(get_db)):
 
 
 @router.delete("/{post_id}/rating", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def delete_post_rating_endpoint(post_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def delete_post_rating_endpoint(post_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -148,7 +194,7 @@ async def delete_post_rating_endpoint(post_id: int, authorization: Optional[str]
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(security)])
-async def delete_post_endpoint(post_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+async def delete_post_endpoint(post_id: int, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db, scope="function")):
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ratemate_app.db.session import get_db
+from ratemate_app.core.query_detector import query_budget
+from ratemate_app.schemas.comment import RatingSummary
+from ratemate_app.services.ratings import get_post_rating_summaries, get_comment_rating_summaries
+
+router = APIRouter()
+
+# lowkeys are left out, they can be followers-only or expired and this endpoint is anonymous
+_SUMMARY_LOADERS = {
+    "post": get_post_rating_summaries,
+    "comment": get_comment_rating_summaries,
+}
+
+@router.get("/summary", response_model=list[RatingSummary])
+@query_budget(3)
+async def get_rating_summaries(targets: list[str] = Query(..., max_length=100), db: AsyncSession = Depends(get_db, scope="function")):
+    wanted: dict[str, list[int]] = {}
+    parsed: list[tuple[str, int]] = []
+    for target in targets:
+        kind, _, raw_id = target.partition(":")
+        if kind not in _SUMMARY_LOADERS or not raw_id.isdigit():
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid target: {target}")
+        parsed.append((kind, int(raw_id)))
+        wanted.setdefault(kind, []).append(int(raw_id))
+
+    summaries = {kind: await _SUMMARY_LOADERS[kind](db, list(dict.fromkeys(ids))) for kind, ids in wanted.items()}
+
+    return [
+        {"target": f"{kind}:{target_id}", "average": summaries[kind][target_id]["average"], "count": summaries[kind][target_id]["count"]}
+        for kind, target_id in dict.fromkeys(parsed)
+    ]
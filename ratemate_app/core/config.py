@@ -20,8 +20,75 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
 
+    HOST: str = "0.0.0.0"
+    PORT: int = 8080
+    WEB_CONCURRENCY: int = 1
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    SHUTDOWN_GRACE_SECONDS: int = 8
+    LEADER_ELECTION_INTERVAL_SECONDS: float = 10.0
+
     AZURE_STORAGE_CONNECTION_STRING: str | None = None
     AZURE_STORAGE_CONTAINER: str | None = None
+    BLOB_DELETE_BATCH_SIZE: int = 50
+    BLOB_DELETE_INTERVAL_SECONDS: int = 10
+    BLOB_DELETE_MAX_ATTEMPTS: int = 8
+    LOWKEY_FANOUT_MAX_FOLLOWERS: int = 5000
+    FOLLOW_GRAPH_CACHE_MAX_USERS: int = 50000
+    FOLLOW_GRAPH_CACHE_TTL_SECONDS: int = 300
+    FOLLOW_SUGGESTIONS_TTL_SECONDS: int = 600
+    FOLLOW_SUGGESTIONS_MAX_SEEDS: int = 500
+    FOLLOW_SUGGESTIONS_MAX_RESULTS: int = 100
+    FOLLOW_BULK_MAX_TARGETS: int = 100
+    FOLLOW_CHANGES_CHECK_INTERVAL_SECONDS: float = 10.0
+    LOWKEY_TTL_HOURS: int = 24
+    LOWKEY_EXPIRY_INTERVAL_SECONDS: int = 300
+    LOWKEY_EXPIRY_BATCH_SIZE: int = 500
+    LOWKEY_VIEW_FLUSH_INTERVAL_SECONDS: float = 2.0
+    LOWKEY_VIEW_FLUSH_BATCH_SIZE: int = 1000
+    LOWKEY_VIEW_SEEN_MAX_LOWKEYS: int = 10000
+    LOWKEY_VIEW_SEEN_MAX_PER_LOWKEY: int = 50000
+    LOWKEY_RECENT_VIEWERS_LIMIT: int = 50
+    LOWKEY_RECENT_VIEWERS_TTL_SECONDS: int = 15
+
+    FEED_WINDOW_HOURS: int = 72
+    FEED_CANDIDATE_LIMIT: int = 300
+    FEED_RECENCY_HALF_LIFE_HOURS: float = 12.0
+    FEED_RECENCY_WEIGHT: float = 1.0
+    FEED_RATING_WEIGHT: float = 0.5
+    FEED_CACHE_TTL_SECONDS: int = 30
+    FEED_CACHE_MAX_USERS: int = 10000
+
+    QUERY_DETECTOR_ENABLED: bool = False
+    QUERY_DETECTOR_DEFAULT_BUDGET: int = 20
+    QUERY_DETECTOR_REPEAT_THRESHOLD: int = 5
+
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_SECONDS: float = 0.1
+    LOOP_WATCHDOG_STALL_THRESHOLD_SECONDS: float = 0.25
+    LOOP_WATCHDOG_WINDOW: int = 600
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SLOW_THRESHOLD_MS: float = 0
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    PROFILING_BUFFER_SIZE: int = 50
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "auto"
+    RATE_LIMIT_REDIS_URL: str | None = None
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_LOGIN: str = "10/60"
+    RATE_LIMIT_REGISTER: str = "5/3600"
+    RATE_LIMIT_RATE: str = "60/60"
+    RATE_LIMIT_CHAT_SEND: str = "30/30"
+    RATE_LIMIT_WRITE: str = "120/60"
+
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "auto"
+    RESPONSE_CACHE_REDIS_URL: str | None = None
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+
     ADMIN_PANEL_KEY: str | None = None
     ADMIN_BASIC_USERNAME: str | None = None
     ADMIN_BASIC_PASSWORD: str | None = None
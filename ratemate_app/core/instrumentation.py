@@ -0,0 +1,133 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from weakref import WeakKeyDictionary
+import time
+
+from sqlalchemy import event
+
+from ratemate_app.core import query_detector
+from ratemate_app.core.metrics import Counter, Gauge, Histogram
+
+http_requests_total = Counter("http_requests_total", "HTTP requests by method, route and status")
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by method and route")
+http_request_db_queries = Histogram("http_request_db_queries", "SQL statements executed per HTTP request", buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+http_request_db_time = Histogram("http_request_db_seconds", "Time spent in SQL statements per HTTP request")
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement latency")
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    statements: Optional[list[str]] = None
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_query_duration.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+def _handle_error(context):
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def install_db_instrumentation(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+_route_tables: WeakKeyDictionary = WeakKeyDictionary()
+
+def _route_table(app) -> list:
+    table = _route_tables.get(app)
+    if table is None:
+        from fastapi.routing import iter_route_contexts
+        from starlette.routing import compile_path
+
+        table = [(compile_path(ctx.path)[0], ctx.methods, ctx.path_format) for ctx in iter_route_contexts(app.routes) if ctx.methods]
+        _route_tables[app] = table
+    return table
+
+def _match_template(scope) -> Optional[str]:
+    # responses sent by outer middleware (429, 304) never reach the router, so match the route template here
+    app = scope.get("app")
+    if app is None or not hasattr(app, "routes"):
+        return None
+    for regex, methods, template in _route_table(app):
+        if scope["method"] in methods and regex.match(scope["path"]):
+            return template
+    return None
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return _match_template(scope) or "unmatched"
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+
+    # routes of included routers only know their own path, so recover the prefix from the request path
+    try:
+        suffix = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    prefix = path[:len(path) - len(suffix)] if path.endswith(suffix) else ""
+    return prefix + template
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(statements=[] if query_detector.is_enabled() else None)
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            _request_stats.reset(token)
+
+            route = route_label(scope)
+            method = scope["method"]
+            http_requests_total.inc(method=method, route=route, status=status_code)
+            http_request_duration.observe(elapsed, method=method, route=route)
+            http_request_db_queries.observe(stats.queries, method=method, route=route)
+            http_request_db_time.observe(stats.db_seconds, method=method, route=route)
+            if stats.statements is not None and "route" in scope:
+                query_detector.inspect_request(f"{method} {route}", scope["route"].endpoint, stats.statements)
@@ -0,0 +1,107 @@
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from ratemate_app.core.config import settings
+from ratemate_app.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+background_leader = Gauge("background_leader", "1 while this worker holds the background job leadership lock")
+
+LEADER_LOCK_KEY = 7305215
+
+
+class LeaderElection:
+    def __init__(self, engine, jobs: dict[str, Callable[[], Awaitable[None]]], lock_key: int = LEADER_LOCK_KEY, interval: float = 10.0):
+        self.engine = engine
+        self.jobs = jobs
+        self.lock_key = lock_key
+        self.interval = interval
+        self._conn = None
+        self._tasks: list[asyncio.Task] = []
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        self._runner = asyncio.create_task(self._run(), name="leader-election")
+
+    async def stop(self) -> None:
+        if self._runner:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        await self._step_down()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._conn is None:
+                    await self._try_acquire()
+                else:
+                    # the lock lives as long as the connection, so a dead connection means lost leadership
+                    await self._conn.execute(text("SELECT 1"))
+                    await self._conn.commit()
+                    self._restart_crashed_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Leader election check failed, stepping down")
+                await self._step_down()
+            await asyncio.sleep(self.interval)
+
+    async def _try_acquire(self) -> None:
+        conn = await self.engine.connect()
+        try:
+            acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key})).scalar_one()
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return
+
+        self._conn = conn
+        self._tasks = [self._spawn(name) for name in self.jobs]
+        background_leader.set(1)
+        logger.info("Acquired background job leadership, running %s jobs", len(self._tasks))
+
+    def _spawn(self, name: str) -> asyncio.Task:
+        return asyncio.create_task(self.jobs[name](), name=name)
+
+    def _restart_crashed_jobs(self) -> None:
+        for i, task in enumerate(self._tasks):
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                logger.error("Background job %s crashed, restarting it", task.get_name(), exc_info=task.exception())
+                self._tasks[i] = self._spawn(task.get_name())
+
+    async def _step_down(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        background_leader.set(0)
+
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+            await conn.commit()
+        except Exception:
+            # never hand a connection that may still hold the lock back to the pool
+            logger.warning("Could not release leadership lock cleanly, discarding the connection")
+            await conn.invalidate()
+        await conn.close()
+
+
+def start_leader_election(engine, jobs: dict[str, Callable[[], Awaitable[None]]]) -> LeaderElection:
+    election = LeaderElection(engine, jobs, interval=settings.LEADER_ELECTION_INTERVAL_SECONDS)
+    election.start()
+    return election
@@ -0,0 +1,154 @@
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import count
+from threading import Lock
+from typing import Any, Optional
+import logging
+import random
+import time
+
+from ratemate_app.core.config import settings
+from ratemate_app.core.instrumentation import current_request_stats, route_label
+from ratemate_app.core.metrics import Counter
+from ratemate_app.core.responses import format_datetime
+
+logger = logging.getLogger(__name__)
+
+profiles_captured_total = Counter("profiles_captured_total", "Request profiles kept in the profile buffer by reason")
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    route: str
+    path: str
+    status: int
+    duration_ms: float
+    db_queries: int
+    db_ms: float
+    reason: str
+    captured_at: datetime
+    session: Any = field(repr=False)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 3),
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_ms, 3),
+            "reason": self.reason,
+            "captured_at": format_datetime(self.captured_at),
+        }
+
+    def render(self, fmt: str = "text") -> str:
+        from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer
+
+        if fmt == "html":
+            return HTMLRenderer().render(self.session)
+        return ConsoleRenderer(unicode=False, color=False, show_all=False).render(self.session)
+
+
+class ProfileBuffer:
+    def __init__(self, maxlen: int):
+        self._items: deque[RequestProfile] = deque(maxlen=maxlen)
+        self._ids = count(1)
+        self._lock = Lock()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._items.append(profile)
+
+    def list(self) -> list[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._items))
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((p for p in self._items if p.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+profile_buffer = ProfileBuffer(settings.PROFILING_BUFFER_SIZE)
+
+_profiler_cls = None
+_profiler_missing = False
+
+def _load_profiler():
+    global _profiler_cls, _profiler_missing
+    if _profiler_cls is None and not _profiler_missing:
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed, request profiling disabled")
+            _profiler_missing = True
+            return None
+        _profiler_cls = Profiler
+    return _profiler_cls
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not settings.PROFILING_ENABLED or scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+        profiler_cls = _load_profiler()
+        if profiler_cls is None:
+            await self.app(scope, receive, send)
+            return
+
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        threshold_ms = settings.PROFILING_SLOW_THRESHOLD_MS
+        # a request can only be known to be slow once it finishes, so threshold mode profiles everything
+        if not sampled and threshold_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = profiler_cls(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            slow = threshold_ms > 0 and duration_ms >= threshold_ms
+            if sampled or slow:
+                reason = "slow" if slow else "sampled"
+                stats = current_request_stats()
+                profile_buffer.add(RequestProfile(
+                    id=profile_buffer.next_id(),
+                    method=scope["method"],
+                    route=route_label(scope),
+                    path=scope["path"],
+                    status=status_code,
+                    duration_ms=duration_ms,
+                    db_queries=stats.queries if stats else 0,
+                    db_ms=stats.db_seconds * 1000 if stats else 0.0,
+                    reason=reason,
+                    captured_at=datetime.now(timezone.utc),
+                    session=session,
+                ))
+                profiles_captured_total.inc(reason=reason)
@@ -0,0 +1,82 @@
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import logging
+import re
+
+from ratemate_app.core.config import settings
+from ratemate_app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+query_budget_violations_total = Counter("query_budget_violations_total", "Requests that exceeded their query budget or repeated a statement shape")
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\$\d+|%\(\w+\)s|\?|:\w+)(?:::\w+(?:\[\])?)?\s*,?)+\)", re.IGNORECASE)
+_PARAM = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?|%\(\w+\)s|\?|:\w+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+@dataclass
+class QueryReport:
+    route: str
+    queries: int
+    budget: int | None
+    repeated: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.queries > self.budget
+
+    @property
+    def ok(self) -> bool:
+        return not self.over_budget and not self.repeated
+
+
+_captured: list[list[QueryReport]] = []
+
+def is_enabled() -> bool:
+    return settings.QUERY_DETECTOR_ENABLED or bool(_captured)
+
+def normalize_statement(statement: str) -> str:
+    shape = _IN_LIST.sub("IN (?)", statement)
+    shape = _STRING.sub("?", shape)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+def query_budget(max_queries: int):
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+def inspect_request(route: str, endpoint, statements: list[str]) -> QueryReport:
+    budget = getattr(endpoint, "__query_budget__", None)
+    if budget is None and settings.QUERY_DETECTOR_DEFAULT_BUDGET > 0:
+        budget = settings.QUERY_DETECTOR_DEFAULT_BUDGET
+
+    shapes = TallyCounter(normalize_statement(s) for s in statements)
+    repeated = {shape: n for shape, n in shapes.items() if n > settings.QUERY_DETECTOR_REPEAT_THRESHOLD}
+    report = QueryReport(route=route, queries=len(statements), budget=budget, repeated=repeated)
+
+    if report.over_budget:
+        query_budget_violations_total.inc(route=route, kind="budget")
+        logger.warning("%s ran %s queries, budget is %s", route, report.queries, budget)
+    for shape, n in repeated.items():
+        query_budget_violations_total.inc(route=route, kind="repeat")
+        logger.warning("%s repeated a statement %s times (possible N+1): %s", route, n, shape[:300])
+
+    for reports in _captured:
+        reports.append(report)
+    return report
+
+@contextmanager
+def capture_query_reports():
+    reports: list[QueryReport] = []
+    _captured.append(reports)
+    try:
+        yield reports
+    finally:
+        _captured.remove(reports)
@@ -0,0 +1,198 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+import json
+import logging
+import math
+import re
+import time
+
+from ratemate_app.auth.security import decode_access_token
+from ratemate_app.core.cache import TTLCache
+from ratemate_app.core.config import settings
+from ratemate_app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+rate_limited_total = Counter("rate_limited_total", "Requests rejected by the rate limiter by policy")
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    capacity: int
+    refill_per_second: float
+    key: str
+
+    @classmethod
+    def parse(cls, name: str, spec: str, key: str) -> "RateLimitPolicy":
+        count, _, seconds = spec.partition("/")
+        capacity = int(count)
+        return cls(name=name, capacity=capacity, refill_per_second=capacity / float(seconds or 1), key=key)
+
+
+POLICY_KEYS = {
+    "login": "ip",
+    "register": "ip",
+    "rate": "user",
+    "chat_send": "user",
+    "write": "user",
+}
+
+def get_policy(name: str) -> RateLimitPolicy:
+    return RateLimitPolicy.parse(name, getattr(settings, f"RATE_LIMIT_{name.upper()}"), POLICY_KEYS[name])
+
+ROUTE_POLICIES: list[tuple[str, re.Pattern, str]] = [
+    ("POST", re.compile(r"^/auth/login/?$"), "login"),
+    ("POST", re.compile(r"^/auth/register/?$"), "register"),
+    ("POST", re.compile(r"^/(posts|comments|lowkeys)/\d+/rate/?$"), "rate"),
+    ("POST", re.compile(r"^/chats/\d+/messages/?$"), "chat_send"),
+]
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def acquire(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> float: ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int):
+        self._buckets = TTLCache(maxsize=max_keys, ttl=float("inf"))
+
+    async def acquire(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (float(capacity), now)
+        tokens = min(float(capacity), tokens + (now - updated) * refill_per_second)
+        if tokens >= cost:
+            self._buckets.set(key, (tokens - cost, now))
+            return 0.0
+        self._buckets.set(key, (tokens, now))
+        return (cost - tokens) / refill_per_second
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local wait = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        wait = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str, prefix: str = "ratemate:rl:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+        self._script = self._redis.register_script(self._SCRIPT)
+
+    async def acquire(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> float:
+        return float(await self._script(keys=[self._prefix + key], args=[capacity, refill_per_second, cost]))
+
+
+_backend: Optional[RateLimitBackend] = None
+
+def rate_limit_backend_name() -> str:
+    name = settings.RATE_LIMIT_BACKEND
+    if name == "auto":
+        # in-memory buckets are per worker, so N workers would allow N times the configured rate
+        return "redis" if (settings.WEB_CONCURRENCY or 1) > 1 else "memory"
+    return name
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        name = rate_limit_backend_name()
+        if name == "redis":
+            if not settings.RATE_LIMIT_REDIS_URL:
+                raise RuntimeError("RATE_LIMIT_REDIS_URL is not configured, it is required for the redis backend and for more than one worker")
+            _backend = RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+        elif name == "memory":
+            if (settings.WEB_CONCURRENCY or 1) > 1:
+                logger.warning("RATE_LIMIT_BACKEND=memory with %s workers, each worker enforces its own limits", settings.WEB_CONCURRENCY)
+            _backend = MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+        else:
+            raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND {name!r}")
+    return _backend
+
+async def check_rate_limit(policy_name: str, identity: str) -> float:
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0.0
+    policy = get_policy(policy_name)
+    try:
+        retry_after = await get_rate_limit_backend().acquire(f"{policy.name}:{identity}", policy.capacity, policy.refill_per_second)
+    except Exception:
+        # fail open, an unavailable limiter must not take the API down with it
+        logger.exception("Rate limiter unavailable")
+        return 0.0
+    if retry_after > 0:
+        rate_limited_total.inc(policy=policy.name)
+    return retry_after
+
+def client_ip(scope) -> str:
+    # uvicorn's proxy_headers has already replaced the peer with the forwarded client for trusted proxies
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def request_user(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return decode_access_token(token.strip()).get("sub")
+            except Exception:
+                return None
+    return None
+
+def match_policy(method: str, path: str) -> Optional[str]:
+    for rule_method, pattern, policy in ROUTE_POLICIES:
+        if method == rule_method and pattern.match(path):
+            return policy
+    return "write" if method in _WRITE_METHODS else None
+
+
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        policy_name = match_policy(scope["method"], scope["path"])
+        if policy_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        user = request_user(scope) if POLICY_KEYS[policy_name] == "user" else None
+        identity = f"user:{user}" if user else f"ip:{client_ip(scope)}"
+        retry_after = await check_rate_limit(policy_name, identity)
+        if retry_after <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({"type": "http.response.start", "status": 429, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
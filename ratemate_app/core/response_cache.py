@@ -0,0 +1,250 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import hashlib
+import json
+import logging
+import re
+import time
+
+from ratemate_app.core.cache import TTLCache
+from ratemate_app.core.config import settings
+from ratemate_app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+response_cache_requests_total = Counter("response_cache_requests_total", "Cacheable requests by cache result")
+
+CACHE_RULES: list[tuple[re.Pattern, str]] = [
+    (re.compile(r"^/posts/(\d+)$"), "post:{0}"),
+    (re.compile(r"^/posts/(\d+)/rating$"), "post:{0}:rating"),
+    (re.compile(r"^/comments/(\d+)$"), "comment:{0}"),
+    (re.compile(r"^/comments/(\d+)/rating$"), "comment:{0}:rating"),
+    (re.compile(r"^/auth/avatar/([^/]+)$"), "avatar:{0}"),
+]
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    @abstractmethod
+    async def get_version(self, resource: str) -> int: ...
+
+    @abstractmethod
+    async def bump_version(self, resource: str) -> None: ...
+
+    async def bump_versions(self, resources: list[str]) -> None:
+        for resource in resources:
+            await self.bump_version(resource)
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: int):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = TTLCache(maxsize=maxsize * 4, ttl=float("inf"))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries.set(key, value)
+
+    async def get_version(self, resource: str) -> int:
+        version = self._versions.get(resource)
+        if version is None:
+            # seed from the clock so an evicted counter never reuses an old ETag
+            version = time.time_ns()
+            self._versions.set(resource, version)
+        return version
+
+    async def bump_version(self, resource: str) -> None:
+        self._versions.set(resource, await self.get_version(resource) + 1)
+
+
+class PostgresCacheBackend(MemoryCacheBackend):
+    # versions are shared through the cache_versions table so a write on any worker invalidates every worker,
+    # bodies stay in local memory because their keys already carry the version
+    def __init__(self, maxsize: int, ttl: int):
+        super().__init__(maxsize, ttl)
+        from ratemate_app.db.session import engine
+
+        self._engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+    def _upsert(self, resources: list[str], on_conflict: dict):
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        from ratemate_app.models.cache_version import CacheVersion
+
+        seed = time.time_ns()
+        stmt = pg_insert(CacheVersion).values([{"resource": r, "version": seed} for r in resources])
+        return stmt.on_conflict_do_update(index_elements=[CacheVersion.resource], set_=on_conflict)
+
+    async def get_version(self, resource: str) -> int:
+        from sqlalchemy import select
+        from ratemate_app.models.cache_version import CacheVersion
+
+        async with self._engine.connect() as conn:
+            version = (await conn.execute(select(CacheVersion.version).where(CacheVersion.resource == resource))).scalar_one_or_none()
+            if version is None:
+                stmt = self._upsert([resource], {"version": CacheVersion.version}).returning(CacheVersion.version)
+                version = (await conn.execute(stmt)).scalar_one()
+        return version
+
+    async def bump_version(self, resource: str) -> None:
+        await self.bump_versions([resource])
+
+    async def bump_versions(self, resources: list[str]) -> None:
+        from ratemate_app.models.cache_version import CacheVersion
+
+        async with self._engine.connect() as conn:
+            await conn.execute(self._upsert(sorted(set(resources)), {"version": CacheVersion.version + 1}))
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, url: str, prefix: str = "ratemate:rc:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._redis.set(self._prefix + key, value, ex=ttl)
+
+    async def get_version(self, resource: str) -> int:
+        key = self._prefix + "v:" + resource
+        version = await self._redis.get(key)
+        if version is None:
+            await self._redis.set(key, time.time_ns(), nx=True)
+            version = await self._redis.get(key)
+        return int(version)
+
+    async def bump_version(self, resource: str) -> None:
+        await self.get_version(resource)
+        await self._redis.incr(self._prefix + "v:" + resource)
+
+
+_backend: Optional[CacheBackend] = None
+
+def cache_backend_name() -> str:
+    name = settings.RESPONSE_CACHE_BACKEND
+    if name == "auto":
+        # an in-process version only sees this worker's writes
+        return "postgres" if (settings.WEB_CONCURRENCY or 1) > 1 else "memory"
+    return name
+
+def get_cache_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        name = cache_backend_name()
+        if name == "redis":
+            if not settings.RESPONSE_CACHE_REDIS_URL:
+                raise RuntimeError("RESPONSE_CACHE_REDIS_URL is not configured")
+            _backend = RedisCacheBackend(settings.RESPONSE_CACHE_REDIS_URL)
+        elif name == "postgres":
+            _backend = PostgresCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS)
+        elif name == "memory":
+            _backend = MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS)
+        else:
+            raise RuntimeError(f"Unknown RESPONSE_CACHE_BACKEND {name!r}")
+    return _backend
+
+async def invalidate(*resources: str) -> None:
+    if not settings.RESPONSE_CACHE_ENABLED or not resources:
+        return
+    try:
+        await get_cache_backend().bump_versions(list(resources))
+    except Exception:
+        logger.exception("Failed to invalidate cached resources %s", ", ".join(resources))
+
+def _match_resource(path: str) -> Optional[str]:
+    for pattern, template in CACHE_RULES:
+        m = pattern.match(path)
+        if m:
+            return template.format(*m.groups())
+    return None
+
+def _etag(path: str, query: str, version: int) -> bytes:
+    # the body differs per query string, so the validator has to as well
+    digest = hashlib.blake2b(f"{path}?{query}:{version}".encode("latin-1"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'.encode()
+
+def _encode_entry(status: int, headers: list[tuple[bytes, bytes]], body: bytes) -> bytes:
+    meta = json.dumps({"status": status, "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers]})
+    return meta.encode() + b"\n" + body
+
+def _decode_entry(entry: bytes) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+    meta, _, body = entry.partition(b"\n")
+    data = json.loads(meta)
+    return data["status"], [(k.encode("latin-1"), v.encode("latin-1")) for k, v in data["headers"]], body
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not settings.RESPONSE_CACHE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        resource = _match_resource(scope["path"])
+        if resource is None or b"authorization" in request_headers:
+            await self.app(scope, receive, send)
+            return
+
+        backend = get_cache_backend()
+        try:
+            version = await backend.get_version(resource)
+        except Exception:
+            logger.exception("Response cache unavailable")
+            await self.app(scope, receive, send)
+            return
+
+        query = scope["query_string"].decode("latin-1")
+        etag = _etag(scope["path"], query, version)
+        cache_headers = [(b"etag", etag), (b"cache-control", b"no-cache")]
+
+        if_none_match = request_headers.get(b"if-none-match")
+        if if_none_match and (if_none_match.strip() == b"*" or etag in [t.strip() for t in if_none_match.split(b",")]):
+            response_cache_requests_total.inc(result="not_modified")
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        key = f"resp:{scope['path']}?{query}:{version}"
+        entry = await backend.get(key)
+        if entry is not None:
+            response_cache_requests_total.inc(result="hit")
+            status, headers, body = _decode_entry(entry)
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        response_cache_requests_total.inc(result="miss")
+        captured: dict = {"chunks": []}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                if message["status"] == 200:
+                    headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in (b"etag", b"cache-control", b"set-cookie")]
+                    captured["headers"] = headers
+                    message = {**message, "headers": headers + cache_headers}
+            elif message["type"] == "http.response.body" and captured.get("status") == 200:
+                captured["chunks"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await send(message)
+                    try:
+                        await backend.set(key, _encode_entry(200, captured["headers"] + cache_headers, b"".join(captured["chunks"])), settings.RESPONSE_CACHE_TTL_SECONDS)
+                    except Exception:
+                        logger.exception("Failed to store cached response for %s", scope["path"])
+                    return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
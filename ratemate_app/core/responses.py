@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+def format_datetime(value: datetime) -> str:
+    # the same shape pydantic gives response models, so hand-built payloads match them
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z).decode()[1:-1]
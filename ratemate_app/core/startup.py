@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+import logging
+import time
+
+from ratemate_app.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+startup_phase_seconds = Gauge("startup_phase_seconds", "Time spent in each application startup phase")
+
+
+class StartupReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last_checkpoint = self.started
+        self.phases: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+        startup_phase_seconds.set(seconds, phase=name)
+
+    def checkpoint(self, name: str) -> None:
+        now = time.perf_counter()
+        self.record(name, now - self._last_checkpoint)
+        self._last_checkpoint = now
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def log(self) -> None:
+        total = sum(self.phases.values())
+        startup_phase_seconds.set(total, phase="total")
+        logger.info("Startup finished in %.0f ms (%s)", total * 1000, ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items()))
@@ -0,0 +1,102 @@
+from collections import deque
+from typing import Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from ratemate_app.core.config import settings
+from ratemate_app.core.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+event_loop_lag = Histogram("event_loop_lag_seconds", "Delay between a scheduled event loop heartbeat and when it ran",
+                           buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+event_loop_lag_quantiles = Gauge("event_loop_lag_quantile_seconds", "Event loop lag percentiles over the recent heartbeat window")
+event_loop_stalls_total = Counter("event_loop_stalls_total", "Times the event loop was blocked for longer than the stall threshold")
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float, stall_threshold: float, window: int):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._samples: deque[float] = deque(maxlen=window)
+        self._last_beat = time.monotonic()
+        self._beats = 0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog-monitor", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def lag_quantiles(self) -> dict[float, float]:
+        values = sorted(self._samples)
+        if not values:
+            return {}
+        return {q: _quantile(values, q) for q in (0.5, 0.95, 0.99)}
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            self._beats += 1
+            self._samples.append(lag)
+            event_loop_lag.observe(lag)
+            if self._beats % 10 == 0:
+                for q, value in self.lag_quantiles().items():
+                    event_loop_lag_quantiles.set(value, quantile=q)
+
+    def _monitor(self) -> None:
+        reported_beat = -1
+        while not self._stopped.wait(self.interval):
+            blocked_for = time.monotonic() - self._last_beat - self.interval
+            # report each stall once, while the loop thread is still inside the blocking call
+            if blocked_for < self.stall_threshold or reported_beat == self._beats:
+                continue
+            reported_beat = self._beats
+            event_loop_stalls_total.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<loop thread not found>"
+            logger.warning("Event loop blocked for %.3fs, loop thread stack:\n%s", blocked_for, stack)
+
+
+_watchdog: Optional[LoopWatchdog] = None
+
+def start_loop_watchdog() -> Optional[LoopWatchdog]:
+    global _watchdog
+    if not settings.LOOP_WATCHDOG_ENABLED or _watchdog is not None:
+        return _watchdog
+    _watchdog = LoopWatchdog(
+        settings.LOOP_WATCHDOG_INTERVAL_SECONDS,
+        settings.LOOP_WATCHDOG_STALL_THRESHOLD_SECONDS,
+        settings.LOOP_WATCHDOG_WINDOW,
+    )
+    _watchdog.start()
+    return _watchdog
+
+async def stop_loop_watchdog() -> None:
+    global _watchdog
+    if _watchdog is not None:
+        await _watchdog.stop()
+        _watchdog = None
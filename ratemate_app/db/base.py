@@ -1,6 +1,10 @@
 from sqlalchemy.orm import declarative_base
 
-Base = declarative_base()
+class _Base:
+    # server defaults (ids, created_at, counters) come back in the INSERT's RETURNING clause instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+Base = declarative_base(cls=_Base)
 
 def import_models():
     from ratemate_app.models.user import User
@@ -10,5 +14,8 @@ def import_models():
     from ratemate_app.models.follow import Follow
     from ratemate_app.models.chat import Chat
     from ratemate_app.models.message import Message
-    from ratemate_app.models.media import Media
-    from ratemate_app.models.lowkey import Lowkey, LowkeyView
\ No newline at end of file
+    from ratemate_app.models.media import Media, MediaBlob
+    from ratemate_app.models.lowkey import Lowkey, LowkeyView
+    from ratemate_app.models.blob_deletion import BlobDeletion
+    from ratemate_app.models.timeline import LowkeyTimeline
+    from ratemate_app.models.cache_version import CacheVersion
\ No newline at end of file
@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
 from ratemate_app.core.config import settings
-from sqlalchemy import text
+from sqlalchemy import event, text
+import inspect
 
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -11,22 +13,55 @@ engine = create_async_engine(
     max_overflow=20
 )
 
+class TrackedSession(Session):
+    pass
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=TrackedSession,
     expire_on_commit=False
 )
 
+@event.listens_for(TrackedSession, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(TrackedSession, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(TrackedSession, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("has_writes", None)
+    session.info.pop("on_commit", None)
+
+def has_writes(db: AsyncSession) -> bool:
+    return bool(db.info.get("has_writes") or db.new or db.dirty or db.deleted)
+
+def on_commit(db: AsyncSession, fn, *args) -> None:
+    # side effects outside the database (caches, in-memory indexes) must only happen once the write is durable
+    db.info.setdefault("on_commit", []).append((fn, args))
+
+async def commit(db: AsyncSession) -> None:
+    await db.commit()
+    db.info.pop("has_writes", None)
+    for fn, args in db.info.pop("on_commit", []):
+        result = fn(*args)
+        if inspect.isawaitable(result):
+            await result
+
 async def get_db() -> AsyncSession:
+    # the session checks a connection out of the pool on its first query, so handlers that never touch it cost nothing
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            if has_writes(session):
+                await commit(session)
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
 
 async def init_db():
     from ratemate_app.db.base import Base, import_models
@@ -34,12 +69,35 @@ async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
         await conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS title VARCHAR NULL"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_owner_created ON posts (owner_id, created_at DESC)"))
         await conn.execute(text("ALTER TABLE ratings ADD COLUMN IF NOT EXISTS comment_id INTEGER NULL"))
         await conn.execute(text("ALTER TABLE ratings ADD COLUMN IF NOT EXISTS lowkey_id INTEGER NULL"))
         await conn.execute(text("ALTER TABLE lowkeys ADD COLUMN IF NOT EXISTS visibility VARCHAR NULL"))
         await conn.execute(text("ALTER TABLE lowkeys ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE"))
+        await conn.execute(text("ALTER TABLE lowkeys ADD COLUMN IF NOT EXISTS fanned_out BOOLEAN NOT NULL DEFAULT FALSE"))
+        await conn.execute(text("ALTER TABLE lowkeys ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ NULL"))
+        await conn.execute(text("UPDATE lowkeys SET expires_at = created_at + interval '24 hours' WHERE expires_at IS NULL"))
+        await conn.execute(text("ALTER TABLE lowkeys ALTER COLUMN expires_at SET DEFAULT now() + interval '24 hours'"))
+        await conn.execute(text("ALTER TABLE lowkeys ALTER COLUMN expires_at SET NOT NULL"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lowkeys_active_expires ON lowkeys (expires_at) WHERE is_active"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lowkey_views_lowkey_recent ON lowkey_views (lowkey_id, viewed_at DESC, id DESC)"))
+        has_view_count = await conn.execute(text("SELECT 1 FROM information_schema.columns WHERE table_name = 'lowkeys' AND column_name = 'view_count'"))
+        if has_view_count.first() is None:
+            await conn.execute(text("ALTER TABLE lowkeys ADD COLUMN view_count INTEGER NOT NULL DEFAULT 0"))
+            await conn.execute(text("UPDATE lowkeys SET view_count = v.n FROM (SELECT lowkey_id, count(*) AS n FROM lowkey_views GROUP BY lowkey_id) v WHERE lowkeys.id = v.lowkey_id"))
+        has_follow_counts = await conn.execute(text("SELECT 1 FROM information_schema.columns WHERE table_name = 'users' AND column_name = 'follower_count'"))
+        if has_follow_counts.first() is None:
+            await conn.execute(text("ALTER TABLE users ADD COLUMN follower_count INTEGER NOT NULL DEFAULT 0"))
+            await conn.execute(text("ALTER TABLE users ADD COLUMN following_count INTEGER NOT NULL DEFAULT 0"))
+            await conn.execute(text("UPDATE users SET follower_count = f.n FROM (SELECT followed_id, count(*) AS n FROM follows GROUP BY followed_id) f WHERE users.id = f.followed_id"))
+            await conn.execute(text("UPDATE users SET following_count = f.n FROM (SELECT follower_id, count(*) AS n FROM follows GROUP BY follower_id) f WHERE users.id = f.follower_id"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_follows_follower_recent ON follows (follower_id, id DESC)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_follows_followed_recent ON follows (followed_id, id DESC)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lowkeys_pull_feed ON lowkeys (owner_id, created_at DESC) WHERE is_active AND NOT fanned_out"))
         await conn.execute(text("ALTER TABLE comments ADD COLUMN IF NOT EXISTS parent_id INTEGER NULL"))
         await conn.execute(text("ALTER TABLE media ADD COLUMN IF NOT EXISTS comment_id INTEGER NULL"))
+        await conn.execute(text("ALTER TABLE media ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64) NULL"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_media_content_hash ON media (content_hash)"))
         await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS first_name VARCHAR NULL"))
         await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_name VARCHAR NULL"))
         await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_url VARCHAR NULL"))
@@ -1,3 +1,7 @@
+from ratemate_app.core.startup import StartupReport
+
+startup_report = StartupReport()
+
 from fastapi import FastAPI
 from fastapi.security import HTTPBearer
 import uvicorn
@@ -8,22 +12,40 @@ from ratemate_app.api.auth import router as auth_router
 from ratemate_app.api.post import router as posts_router
 from ratemate_app.api.comment import router as comments_router
 from ratemate_app.api.follow import router as follows_router
-from ratemate_app.api.chat import router as chats_router
+from ratemate_app.api.chat import router as chats_router, close_chat_connections
 from ratemate_app.api.admin import router as admin_router
 from ratemate_app.api.lowkey import router as lowkeys_router
+from ratemate_app.api.ratings import router as ratings_router
 
-from ratemate_app.db.session import init_db, AsyncSessionLocal
-from ratemate_app.db.base import import_models
+from ratemate_app.core.config import settings
+from ratemate_app.db.session import init_db, AsyncSessionLocal, engine
+from ratemate_app.core.response_cache import ResponseCacheMiddleware
+from ratemate_app.core.instrumentation import RequestMetricsMiddleware, install_db_instrumentation
+from ratemate_app.core.profiling import ProfilingMiddleware
+from ratemate_app.core.rate_limit import RateLimitMiddleware, get_rate_limit_backend
+from ratemate_app.core.watchdog import start_loop_watchdog, stop_loop_watchdog
+from ratemate_app.core.leadership import start_leader_election
 
 from ratemate_app.services.lowkey import run_lowkey_expirer
+from ratemate_app.services.media import run_blob_deleter
+from ratemate_app.services.lowkey_views import run_view_flusher
+from ratemate_app.services.follow_graph import run_follow_change_listener
 
-import_models()
+startup_report.checkpoint("imports")
 
 app = FastAPI(
     title="RateMate",
     version="1.0.0"
 )
 
+install_db_instrumentation(engine)
+
+# the last one added runs outermost, metrics wrap everything so 429s and 304s are counted too
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -33,8 +55,22 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def on_startup():
-    await init_db()
-    app.state.lowkey_task = asyncio.create_task(run_lowkey_expirer(AsyncSessionLocal))
+    with startup_report.phase("init_db"):
+        await init_db()
+    if settings.RATE_LIMIT_ENABLED:
+        # fail at startup rather than fail open on every request
+        get_rate_limit_backend()
+    with startup_report.phase("background_tasks"):
+        start_loop_watchdog()
+        # buffered lowkey views live in this worker's memory, so every worker flushes its own
+        app.state.view_flush_task = asyncio.create_task(run_view_flusher(AsyncSessionLocal))
+        # each worker caches the follow graph, so each one listens for follow changes made by the others
+        app.state.follow_listener_task = asyncio.create_task(run_follow_change_listener(engine))
+        app.state.leader_election = start_leader_election(engine, {
+            "lowkey_expirer": lambda: run_lowkey_expirer(AsyncSessionLocal),
+            "blob_deleter": lambda: run_blob_deleter(AsyncSessionLocal),
+        })
+    startup_report.log()
 
 @app.get("/")
 def root():
@@ -42,16 +78,24 @@ def root():
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    task = getattr(app.state, "lowkey_task", None)
-    if task:
-        task.cancel()
+    await close_chat_connections()
+    leader_election = getattr(app.state, "leader_election", None)
+    if leader_election:
+        await leader_election.stop()
+    for name in ("view_flush_task", "follow_listener_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    await stop_loop_watchdog()
 
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(posts_router, prefix="/posts", tags=["Posts"])
 app.include_router(comments_router, prefix="/comments", tags=["Comments"])
 app.include_router(follows_router, prefix="/follows", tags=["Follows"])
 app.include_router(chats_router, prefix="/chats", tags=["Chats"])
-app.include_router(admin_router, prefix="/lowkeys", tags=["Lowkeys"])
+app.include_router(lowkeys_router, prefix="/lowkeys", tags=["Lowkeys"])
+app.include_router(ratings_router, prefix="/ratings", tags=["Ratings"])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 from fastapi.openapi.utils import get_openapi
@@ -71,5 +115,7 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+startup_report.checkpoint("app")
+
 if __name__ == "__main__":
-    uvicorn.run("ratemate_app.main:app", host="127.0.0.1", port=8080, reload=True)
\ No newline at end of file
+    uvicorn.run("ratemate_app.main:app", host="127.0.0.1", port=8080, reload=settings.DEBUG)
\ No newline at end of file
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, String, BigInteger
+from ratemate_app.db.base import Base
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    resource = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
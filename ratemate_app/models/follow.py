@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ratemate_app.db.base import Base
@@ -17,6 +17,8 @@ class Follow(Base):
     __table_args__ = (
         UniqueConstraint("follower_id", "followed_id", name="uq_follow_pair"),
         CheckConstraint("follower_id <> followed_id", name="chk_no_self_follow"),
+        Index("ix_follows_follower_recent", "follower_id", id.desc()),
+        Index("ix_follows_followed_recent", "followed_id", id.desc()),
     )
 
     follower = relationship("User", foreign_keys=[follower_id])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, CheckConstraint, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, CheckConstraint, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ratemate_app.db.base import Base
@@ -13,10 +13,14 @@ class Lowkey(Base):
     media_type = Column(String, nullable=True)
     visibility = Column(String, nullable=True)
     is_active = Column(Boolean, nullable=False, server_default="true")
+    fanned_out = Column(Boolean, nullable=False, server_default="false")
+    view_count = Column(Integer, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, server_default=text("now() + interval '24 hours'"))
 
     __table_args__ = (
         CheckConstraint("visibility IN ('public','followers')", name="lowkey_visibility_enum"),
+        Index("ix_lowkeys_active_expires", "expires_at", postgresql_where=text("is_active")),
     )
 
     owner = relationship("User")
@@ -33,6 +37,7 @@ class LowkeyView(Base):
 
     __table_args__ = (
         UniqueConstraint("lowkey_id", "viewer_id", name="uq_lowkey_view_unique"),
+        Index("ix_lowkey_views_lowkey_recent", "lowkey_id", viewed_at.desc(), id.desc()),
     )
 
     lowkey = relationship("Lowkey", back_populates="views")
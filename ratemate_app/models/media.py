@@ -13,6 +13,7 @@ class Media(Base):
     comment_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True, index=True)
     url = Column(String, nullable=False)
     media_type = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -22,4 +23,16 @@ class Media(Base):
     )
 
     post = relationship("Post", back_populates="media")
-    comment = relationship("Comment", back_populates="media")
\ No newline at end of file
+    comment = relationship("Comment", back_populates="media")
+
+class MediaBlob(Base):
+    __tablename__ = "media_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True, index=True)
+    url = Column(String, nullable=False, unique=True)
+    content_type = Column(String, nullable=True)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.orm import relationship
+from ratemate_app.db.base import Base
+
+class LowkeyTimeline(Base):
+    __tablename__ = "lowkey_timeline"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    lowkey_id = Column(Integer, ForeignKey("lowkeys.id", ondelete="CASCADE"), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "lowkey_id", name="uq_lowkey_timeline_entry"),
+        Index("ix_lowkey_timeline_user_created", "user_id", "created_at"),
+    )
+
+    lowkey = relationship("Lowkey")
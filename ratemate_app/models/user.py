@@ -17,6 +17,9 @@ class User(Base):
 
     is_active = Column(Boolean, default=True)
 
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     posts = relationship("Post", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
@@ -37,7 +37,11 @@ class CommentRead(BaseModel):
 
     @field_serializer('media_urls')
     def _ser_media_urls(self, v):
-        return v if v else [m.urls for m in getattr(self, 'media', [])]
+        return v if v else [m.url for m in getattr(self, 'media', [])]
+
+class CommentWithRating(CommentRead):
+    rating_average: float = 0.0
+    rating_count: int = 0
 
 class RatingRequest(BaseModel):
     score: int
@@ -52,4 +56,7 @@ class RatingRequest(BaseModel):
 class RatingResponse(BaseModel):
     success: bool
 
-    
\ No newline at end of file
+class RatingSummary(BaseModel):
+    target: str
+    average: float
+    count: int
@@ -12,10 +12,16 @@ class LowkeyRead(BaseModel):
     media_type: str | None = None
     created_at: datetime
     expires_at: datetime
+    view_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
 class LowkeyViewRead(BaseModel):
     viewer_id: int
     username: str
-    viewed_at: datetime
\ No newline at end of file
+    viewed_at: datetime
+
+class LowkeyViewsPage(BaseModel):
+    view_count: int
+    items: list[LowkeyViewRead]
+    next_cursor: str | None = None
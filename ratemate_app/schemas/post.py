@@ -30,4 +30,11 @@ class PostRead(PostBase):
 
     @field_serializer('media_urls')
     def _ser_media_urls(self, v):
-        return v if v else [m.urls for m in getattr(self, 'media', [])]
\ No newline at end of file
+        return v if v else [m.url for m in getattr(self, 'media', [])]
+
+class PostWithRating(PostRead):
+    rating_average: float = 0.0
+    rating_count: int = 0
+
+class PostFeedItem(PostWithRating):
+    score: float
@@ -42,4 +42,22 @@ class ProfileUpdateRequest(BaseModel):
 class UserSummary(BaseModel):
     id: int
     username: str
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class UserSummaryPage(BaseModel):
+    items: list[UserSummary]
+    next_cursor: int | None = None
+
+class FollowCounts(BaseModel):
+    follower_count: int
+    following_count: int
+
+class FollowSuggestion(UserSummary):
+    mutual_count: int
+
+class BulkFollowRequest(BaseModel):
+    user_ids: list[int]
+
+class BulkFollowResult(BaseModel):
+    user_id: int
+    status: str
@@ -0,0 +1,50 @@
+from importlib.util import find_spec
+import os
+
+import uvicorn
+
+from ratemate_app.core.config import settings
+
+def _cgroup_cpu_limit() -> int | None:
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return max(1, int(quota) // int(period))
+
+def worker_count() -> int:
+    # 0 means one worker per available CPU
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    limit = _cgroup_cpu_limit()
+    return max(1, min(cpus, limit) if limit else cpus)
+
+def main() -> None:
+    workers = worker_count()
+    # workers re-read settings from the environment and pick shared backends from the resolved count
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    settings.WEB_CONCURRENCY = workers
+    if workers > 1 and settings.RATE_LIMIT_ENABLED:
+        from ratemate_app.core.rate_limit import rate_limit_backend_name
+        if rate_limit_backend_name() == "redis" and not settings.RATE_LIMIT_REDIS_URL:
+            raise SystemExit(f"{workers} workers need shared rate limit buckets: set RATE_LIMIT_REDIS_URL or WEB_CONCURRENCY=1")
+
+    uvicorn.run(
+        "ratemate_app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS,
+        access_log=settings.DEBUG,
+    )
+
+if __name__ == "__main__":
+    main()
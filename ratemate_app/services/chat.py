@@ -22,8 +22,7 @@ async def get_or_create_chat(db: AsyncSession, user1_id: int, user2_id: int) ->
     
     chat = Chat(user1_id=a, user2_id=b)
     db.add(chat)
-    await db.commit()
-    await db.refresh(chat)
+    await db.flush()
     return chat
 
 async def send_message(db: AsyncSession, chat_id: int, sender_id: int, content: str) -> Message:
@@ -35,8 +34,7 @@ async def send_message(db: AsyncSession, chat_id: int, sender_id: int, content:
     
     msg = Message(chat_id=chat_id, sender_id=sender_id, content=content.strip())
     db.add(msg)
-    await db.commit()
-    await db.refresh(msg)
+    await db.flush()
     return msg
 
 async def list_recent_messages(db: AsyncSession, chat_id: int, limit: int = 50, offset: int = 0) -> list[Message]:
@@ -58,6 +56,5 @@ async def redact_message_content(db: AsyncSession, message_id: int, requester_id
         raise ValueError("forbidden")
     msg.content = ""
     
-    await db.commit()
-    await db.refresh(msg)
+    await db.flush()
     return msg
\ No newline at end of file
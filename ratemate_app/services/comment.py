@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, RowMapping
 from ratemate_app.models.comment import Comment
 from ratemate_app.schemas.comment import CommentCreate
+from ratemate_app.core.response_cache import invalidate
+from ratemate_app.db.session import on_commit
 
 async def create_comment(db: AsyncSession, user_id: int, payload: CommentCreate) -> Comment:
     if payload.parent_id is not None:
@@ -14,12 +16,12 @@ async def create_comment(db: AsyncSession, user_id: int, payload: CommentCreate)
         user_id=user_id,
         post_id=payload.post_id,
         content=payload.content.strip(),
-        parent_id=payload.parent_id
+        parent_id=payload.parent_id,
+        media=[]
     )
 
     db.add(comment)
-    await db.commit()
-    await db.refresh(comment)
+    await db.flush()
     return comment
 
 async def list_post_comments(db: AsyncSession, post_id: int, limit: int = 100, offset: int = 0) -> list[Comment]:
@@ -32,6 +34,30 @@ async def list_post_comments(db: AsyncSession, post_id: int, limit: int = 100, o
     )
     return result.scalars().all()
 
+async def list_post_comment_rows(db: AsyncSession, post_id: int, limit: int = 100, offset: int = 0) -> list[RowMapping]:
+    result = await db.execute(
+        select(Comment.id, Comment.user_id, Comment.post_id, Comment.content, Comment.created_at, Comment.parent_id)
+        .where(Comment.post_id == post_id)
+        .order_by(Comment.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return result.mappings().all()
+
+async def get_comments_by_ids(db: AsyncSession, comment_ids: list[int]) -> list[RowMapping]:
+    if not comment_ids:
+        return []
+    result = await db.execute(
+        select(Comment.id, Comment.user_id, Comment.post_id, Comment.content, Comment.created_at, Comment.parent_id)
+        .where(Comment.id.in_(comment_ids))
+    )
+    rows = {row["id"]: row for row in result.mappings().all()}
+    return [rows[cid] for cid in dict.fromkeys(comment_ids) if cid in rows]
+
 async def delete_comment(db: AsyncSession, comment: Comment) -> None:
+    from ratemate_app.services.media import release_media_blobs
+    from ratemate_app.models.media import Media
+
+    await release_media_blobs(db, Media.comment_id == comment.id)
     await db.execute(delete(Comment).where(Comment.id == comment.id))
-    await db.commit()
\ No newline at end of file
+    on_commit(db, invalidate, f"comment:{comment.id}", f"comment:{comment.id}:rating")
\ No newline at end of file
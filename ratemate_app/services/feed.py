@@ -0,0 +1,68 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+
+from ratemate_app.core.cache import TTLCache
+from ratemate_app.core.config import settings
+from ratemate_app.models.post import Post
+from ratemate_app.models.follow import Follow
+from ratemate_app.schemas.media import MediaRead
+from ratemate_app.schemas.post import PostFeedItem
+from ratemate_app.services.ratings import get_post_rating_summaries
+from ratemate_app.services.media import list_media_for_posts
+
+_feed_cache = TTLCache(maxsize=settings.FEED_CACHE_MAX_USERS, ttl=settings.FEED_CACHE_TTL_SECONDS)
+
+def score_post(created_at: datetime, average: float, count: int, now: datetime) -> float:
+    age_hours = max((now - created_at).total_seconds() / 3600, 0.0)
+    recency = 0.5 ** (age_hours / settings.FEED_RECENCY_HALF_LIFE_HOURS)
+    rating = (average / 10) * (count / (count + 1))
+    return settings.FEED_RECENCY_WEIGHT * recency + settings.FEED_RATING_WEIGHT * rating
+
+async def _build_home_feed(db: AsyncSession, user_id: int) -> list[PostFeedItem]:
+    now = datetime.now(timezone.utc)
+    q = await db.execute(
+        select(Post)
+        .join(Follow, Follow.followed_id == Post.owner_id)
+        .where(Follow.follower_id == user_id)
+        .where(Post.created_at >= now - timedelta(hours=settings.FEED_WINDOW_HOURS))
+        .order_by(Post.created_at.desc())
+        .limit(settings.FEED_CANDIDATE_LIMIT)
+    )
+    posts = q.scalars().all()
+    if not posts:
+        return []
+
+    post_ids = [p.id for p in posts]
+    summaries = await get_post_rating_summaries(db, post_ids)
+    medias = await list_media_for_posts(db, post_ids)
+
+    items: list[PostFeedItem] = []
+    for post in posts:
+        summary = summaries[post.id]
+        media_reads = [MediaRead.model_validate(m, from_attributes=True) for m in medias.get(post.id, [])]
+        items.append(PostFeedItem.model_validate({
+            "id": post.id,
+            "owner_id": post.owner_id,
+            "title": post.title,
+            "content": post.content,
+            "created_at": post.created_at,
+            "media": media_reads,
+            "media_urls": [mr.url for mr in media_reads],
+            "rating_average": summary["average"],
+            "rating_count": summary["count"],
+            "score": score_post(post.created_at, summary["average"], summary["count"], now),
+        }))
+
+    items.sort(key=lambda item: (item.score, item.id), reverse=True)
+    return items
+
+async def get_home_feed(db: AsyncSession, user_id: int, limit: int = 20, offset: int = 0) -> list[PostFeedItem]:
+    ranked = _feed_cache.get(user_id)
+    if ranked is None:
+        ranked = await _build_home_feed(db, user_id)
+        _feed_cache.set(user_id, ranked)
+    return ranked[offset:offset + limit]
+
+def invalidate_home_feed(user_id: int) -> None:
+    _feed_cache.pop(user_id)
@@ -1,9 +1,28 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.orm import aliased
+from sqlalchemy import select, delete, update, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from ratemate_app.models.follow import Follow
 from ratemate_app.models.user import User
+from ratemate_app.core.config import settings
+from ratemate_app.db.session import on_commit
+from ratemate_app.services.timeline import add_followee_to_timeline, remove_followee_from_timeline, add_followees_to_timeline, remove_followees_from_timeline
+from ratemate_app.services.feed import invalidate_home_feed
+from ratemate_app.services.follow_graph import add_followee, remove_followee, get_mutual_followees, get_follow_suggestions, notify_follow_change
+
+async def adjust_follow_counts(db: AsyncSession, following: dict[int, int], followers: dict[int, int]) -> None:
+    ids = sorted(following.keys() | followers.keys())
+    if not ids:
+        return
+    # lock in ascending id order so crossing follows (A->B while B->A) queue instead of deadlocking;
+    # NO KEY UPDATE still lets concurrent follow inserts take their FK KEY SHARE locks
+    await db.execute(select(User.id).where(User.id.in_(ids)).order_by(User.id).with_for_update(key_share=True))
+    values = {}
+    if following:
+        values["following_count"] = User.following_count + case(following, value=User.id, else_=0)
+    if followers:
+        values["follower_count"] = User.follower_count + case(followers, value=User.id, else_=0)
+    await db.execute(update(User).where(User.id.in_(ids)).values(**values))
 
 async def follow_user(db: AsyncSession, follower_id: int, followed_id: int) -> Follow:
     if follower_id == followed_id:
@@ -17,36 +36,126 @@ async def follow_user(db: AsyncSession, follower_id: int, followed_id: int) -> F
     
     f = Follow(follower_id=follower_id, followed_id=followed_id)
     db.add(f)
+    await db.flush()
+    await adjust_follow_counts(db, {follower_id: 1}, {followed_id: 1})
+    await add_followee_to_timeline(db, follower_id, followed_id)
+    await notify_follow_change(db, follower_id)
 
-    await db.commit()
-    await db.refresh(f)
+    on_commit(db, add_followee, follower_id, followed_id)
+    on_commit(db, invalidate_home_feed, follower_id)
 
     return f
 
 async def unfollow_user(db: AsyncSession, follower_id: int, followed_id: int) -> None:
-    await db.execute(delete(Follow).where(Follow.follower_id == follower_id, Follow.followed_id == followed_id))
-    await db.commit()
+    q = await db.execute(delete(Follow).where(Follow.follower_id == follower_id, Follow.followed_id == followed_id).returning(Follow.id))
+    if q.first() is None:
+        return
 
-async def list_following(db: AsyncSession, user_id: int) -> list[User]:
-    result = await db.execute(
-        select(User).join(Follow, Follow.followed_id == User.id).where(Follow.follower_id == user_id)
-    )
-    return result.scalars().all()
+    await adjust_follow_counts(db, {follower_id: -1}, {followed_id: -1})
+    await remove_followee_from_timeline(db, follower_id, followed_id)
+    await notify_follow_change(db, follower_id)
+    on_commit(db, remove_followee, follower_id, followed_id)
+    on_commit(db, invalidate_home_feed, follower_id)
+
+async def follow_users(db: AsyncSession, follower_id: int, followed_ids: list[int]) -> dict[int, str]:
+    targets = list(dict.fromkeys(followed_ids))
+    if len(targets) > settings.FOLLOW_BULK_MAX_TARGETS:
+        raise ValueError("too_many_targets")
+
+    q = await db.execute(select(User.id).where(User.id.in_(targets)))
+    existing = set(q.scalars().all())
+    outcomes = {uid: ("self" if uid == follower_id else "not_found") for uid in targets}
+    candidates = [uid for uid in targets if uid in existing and uid != follower_id]
+    if not candidates:
+        return outcomes
 
-async def list_followers(db: AsyncSession, user_id: int) -> list[User]:
-    result = await db.execute(
-        select(User).join(Follow, Follow.follower_id == User.id).where(Follow.followed_id == user_id)
+    q = await db.execute(
+        pg_insert(Follow)
+        .values([{"follower_id": follower_id, "followed_id": uid} for uid in candidates])
+        .on_conflict_do_nothing(constraint="uq_follow_pair")
+        .returning(Follow.followed_id)
     )
-    return result.scalars().all()
+    inserted = q.scalars().all()
+    for uid in candidates:
+        outcomes[uid] = "already_following"
+    if not inserted:
+        return outcomes
 
-async def list_common_following(db: AsyncSession, user_id_a: int, user_id_b: int) -> list[User]:
-    F1 = aliased(Follow)
-    F2 = aliased(Follow)
+    await adjust_follow_counts(db, {follower_id: len(inserted)}, {uid: 1 for uid in inserted})
+    await add_followees_to_timeline(db, follower_id, inserted)
+    await notify_follow_change(db, follower_id)
 
-    result = await db.execute(
-        select(User).join(F1, F1.followed_id == User.id)
-        .join(F2, F2.followed_id == User.id)
-        .where(F1.follower_id == user_id_a, F2.follower_id == user_id_b)
+    for uid in inserted:
+        outcomes[uid] = "followed"
+        on_commit(db, add_followee, follower_id, uid)
+    on_commit(db, invalidate_home_feed, follower_id)
+    return outcomes
+
+async def unfollow_users(db: AsyncSession, follower_id: int, followed_ids: list[int]) -> dict[int, str]:
+    targets = list(dict.fromkeys(followed_ids))
+    if len(targets) > settings.FOLLOW_BULK_MAX_TARGETS:
+        raise ValueError("too_many_targets")
+
+    outcomes = {uid: "not_following" for uid in targets}
+    if not targets:
+        return outcomes
+
+    q = await db.execute(
+        delete(Follow)
+        .where(Follow.follower_id == follower_id, Follow.followed_id.in_(targets))
+        .returning(Follow.followed_id)
     )
+    removed = q.scalars().all()
+    if not removed:
+        return outcomes
+
+    await adjust_follow_counts(db, {follower_id: -len(removed)}, {uid: -1 for uid in removed})
+    await remove_followees_from_timeline(db, follower_id, removed)
+    await notify_follow_change(db, follower_id)
+
+    for uid in removed:
+        outcomes[uid] = "unfollowed"
+        on_commit(db, remove_followee, follower_id, uid)
+    on_commit(db, invalidate_home_feed, follower_id)
+    return outcomes
+
+async def list_following(db: AsyncSession, user_id: int, limit: int = 50, cursor: int | None = None) -> tuple[list[tuple[int, str]], int | None]:
+    stmt = (select(Follow.id, User.id, User.username)
+            .join(User, User.id == Follow.followed_id)
+            .where(Follow.follower_id == user_id))
+    return await _follow_page(db, stmt, limit, cursor)
+
+async def list_followers(db: AsyncSession, user_id: int, limit: int = 50, cursor: int | None = None) -> tuple[list[tuple[int, str]], int | None]:
+    stmt = (select(Follow.id, User.id, User.username)
+            .join(User, User.id == Follow.follower_id)
+            .where(Follow.followed_id == user_id))
+    return await _follow_page(db, stmt, limit, cursor)
+
+async def _follow_page(db: AsyncSession, stmt, limit: int, cursor: int | None) -> tuple[list[tuple[int, str]], int | None]:
+    if cursor is not None:
+        stmt = stmt.where(Follow.id < cursor)
+    q = await db.execute(stmt.order_by(Follow.id.desc()).limit(limit + 1))
+    rows = q.all()
+
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return [(uid, uname) for (_, uid, uname) in rows[:limit]], next_cursor
+
+async def get_follow_counts(db: AsyncSession, user_id: int) -> tuple[int, int] | None:
+    q = await db.execute(select(User.follower_count, User.following_count).where(User.id == user_id))
+    return q.first()
+
+async def _user_summaries(db: AsyncSession, user_ids: list[int]) -> dict[int, str]:
+    if not user_ids:
+        return {}
+    q = await db.execute(select(User.id, User.username).where(User.id.in_(user_ids)))
+    return dict(q.all())
+
+async def list_common_following(db: AsyncSession, user_id_a: int, user_id_b: int) -> list[tuple[int, str]]:
+    common = await get_mutual_followees(db, user_id_a, user_id_b)
+    names = await _user_summaries(db, common)
+    return [(uid, names[uid]) for uid in common if uid in names]
 
-    return result.scalars().all()
\ No newline at end of file
+async def list_follow_suggestions(db: AsyncSession, user_id: int, limit: int = 20) -> list[tuple[int, str, int]]:
+    ranked = await get_follow_suggestions(db, user_id, limit)
+    names = await _user_summaries(db, [uid for uid, _ in ranked])
+    return [(uid, names[uid], n) for uid, n in ranked if uid in names]
@@ -0,0 +1,195 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from ratemate_app.core.cache import TTLCache
+from ratemate_app.core.config import settings
+from ratemate_app.models.follow import Follow
+
+_followees = TTLCache(maxsize=settings.FOLLOW_GRAPH_CACHE_MAX_USERS, ttl=settings.FOLLOW_GRAPH_CACHE_TTL_SECONDS)
+_suggestions = TTLCache(maxsize=settings.FOLLOW_GRAPH_CACHE_MAX_USERS, ttl=settings.FOLLOW_SUGGESTIONS_TTL_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+FOLLOW_CHANGES_CHANNEL = "follow_changes"
+
+# bumped on every invalidation, so a load that raced one does not cache what it read
+_generation = 0
+# True only while this worker is subscribed to follow changes made by the others
+_listening = False
+
+def _contains(ids: array, value: int) -> bool:
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+def intersect_sorted(a: array, b: array) -> list[int]:
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) * 8 < len(b):
+        return [x for x in a if _contains(b, x)]
+
+    out: list[int] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            out.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+async def load_followees(db: AsyncSession, user_ids: list[int]) -> dict[int, array]:
+    out: dict[int, array] = {}
+    missing: list[int] = []
+    for user_id in user_ids:
+        ids = _followees.get(user_id)
+        if ids is None:
+            missing.append(user_id)
+        else:
+            out[user_id] = ids
+
+    if missing:
+        generation = _generation
+        q = await db.execute(
+            select(Follow.follower_id, Follow.followed_id)
+            .where(Follow.follower_id.in_(missing))
+            .order_by(Follow.follower_id, Follow.followed_id)
+        )
+        loaded = {user_id: array("i") for user_id in missing}
+        for follower_id, followed_id in q.all():
+            loaded[follower_id].append(followed_id)
+        if generation == _generation:
+            for user_id, ids in loaded.items():
+                _followees.set(user_id, ids)
+        out.update(loaded)
+    return out
+
+async def get_followees(db: AsyncSession, user_id: int) -> array:
+    return (await load_followees(db, [user_id]))[user_id]
+
+async def get_visible_followees(db: AsyncSession, user_id: int) -> array | None:
+    """Followees safe to authorize with, or None when the cache may miss an unfollow made on another worker."""
+    if not _listening:
+        return None
+    return await get_followees(db, user_id)
+
+async def is_following(db: AsyncSession, follower_id: int, followed_id: int) -> bool:
+    followees = await get_visible_followees(db, follower_id)
+    if followees is not None:
+        return _contains(followees, followed_id)
+    q = await db.execute(select(Follow.id).where(Follow.follower_id == follower_id, Follow.followed_id == followed_id).limit(1))
+    return q.first() is not None
+
+async def can_view_lowkey(db: AsyncSession, viewer_id: int, lowkey) -> bool:
+    if getattr(lowkey, "visibility", None) != 'followers' or viewer_id == lowkey.owner_id:
+        return True
+    return await is_following(db, viewer_id, lowkey.owner_id)
+
+async def get_mutual_followees(db: AsyncSession, user_id_a: int, user_id_b: int) -> list[int]:
+    graph = await load_followees(db, [user_id_a, user_id_b])
+    return intersect_sorted(graph[user_id_a], graph[user_id_b])
+
+async def get_follow_suggestions(db: AsyncSession, user_id: int, limit: int = 20) -> list[tuple[int, int]]:
+    """Rank friends-of-friends by how many of the user's most recent follows (by Follow.id) follow them."""
+    cached = _suggestions.get(user_id)
+    if cached is not None:
+        return cached[:limit]
+
+    mine = await get_followees(db, user_id)
+    q = await db.execute(
+        select(Follow.followed_id)
+        .where(Follow.follower_id == user_id)
+        .order_by(Follow.id.desc())
+        .limit(settings.FOLLOW_SUGGESTIONS_MAX_SEEDS)
+    )
+    seeds = q.scalars().all()
+    graph = await load_followees(db, seeds)
+
+    candidates: Counter[int] = Counter()
+    for seed in seeds:
+        candidates.update(graph[seed])
+
+    ranked = sorted(
+        ((cid, n) for cid, n in candidates.items() if cid != user_id and not _contains(mine, cid)),
+        key=lambda item: (-item[1], item[0]),
+    )[:settings.FOLLOW_SUGGESTIONS_MAX_RESULTS]
+    _suggestions.set(user_id, ranked)
+    return ranked[:limit]
+
+def add_followee(follower_id: int, followed_id: int) -> None:
+    ids = _followees.get(follower_id)
+    if ids is not None and not _contains(ids, followed_id):
+        insort(ids, followed_id)
+    _suggestions.pop(follower_id)
+
+def remove_followee(follower_id: int, followed_id: int) -> None:
+    ids = _followees.get(follower_id)
+    if ids is not None:
+        i = bisect_left(ids, followed_id)
+        if i < len(ids) and ids[i] == followed_id:
+            del ids[i]
+    _suggestions.pop(follower_id)
+
+def invalidate_followees(user_id: int) -> None:
+    global _generation
+    _generation += 1
+    _followees.pop(user_id)
+    _suggestions.pop(user_id)
+
+def _invalidate_all() -> None:
+    global _generation
+    _generation += 1
+    _followees.clear()
+    _suggestions.clear()
+
+async def notify_follow_change(db: AsyncSession, follower_id: int) -> None:
+    # NOTIFY is transactional, the other workers hear about it only once the follow change commits
+    await db.execute(select(func.pg_notify(FOLLOW_CHANGES_CHANNEL, str(follower_id))))
+
+def _on_follow_change(connection, pid, channel, payload) -> None:
+    invalidate_followees(int(payload))
+
+def _on_listener_lost(connection) -> None:
+    global _listening
+    _listening = False
+
+async def run_follow_change_listener(engine) -> None:
+    global _listening
+    while True:
+        conn = None
+        try:
+            conn = await engine.connect()
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.add_listener(FOLLOW_CHANGES_CHANNEL, _on_follow_change)
+            raw.add_termination_listener(_on_listener_lost)
+            # changes made while we were not listening were missed
+            _invalidate_all()
+            _listening = True
+            while True:
+                await asyncio.sleep(settings.FOLLOW_CHANGES_CHECK_INTERVAL_SECONDS)
+                await raw.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Follow change listener failed, serving visibility from the database")
+        finally:
+            _listening = False
+            if conn is not None:
+                # LISTEN lives as long as the connection, never hand it back to the pool
+                await asyncio.shield(_discard(conn))
+        await asyncio.sleep(settings.FOLLOW_CHANGES_CHECK_INTERVAL_SECONDS)
+
+async def _discard(conn) -> None:
+    try:
+        await conn.invalidate()
+        await conn.close()
+    except Exception:
+        logger.warning("Could not close the follow change listener connection")
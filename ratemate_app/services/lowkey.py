@@ -1,90 +1,143 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func, text, text as _text
+from sqlalchemy import select, delete, update, func, tuple_, RowMapping
 from fastapi import UploadFile
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import asyncio
+import base64
+import logging
 
+from ratemate_app.core.config import settings
+from ratemate_app.core.metrics import Counter, Gauge
+from ratemate_app.db.session import on_commit
 from ratemate_app.models.lowkey import Lowkey, LowkeyView
 from ratemate_app.models.follow import Follow
 from ratemate_app.models.user import User
+from ratemate_app.services.timeline import LOWKEY_READ_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+_EXPIRER_LOCK_KEY = 7305214
+
+lowkeys_expired_total = Counter("lowkeys_expired_total", "Lowkeys deactivated by the expiry job")
+lowkey_expiry_runs_total = Counter("lowkey_expiry_runs_total", "Lowkey expiry job runs by result")
+lowkey_expiry_last_run = Gauge("lowkey_expiry_last_run_timestamp_seconds", "Unix time of the last completed lowkey expiry run")
 
 async def create_lowkey(db: AsyncSession, owner_id: int, title: str | None, file: UploadFile, visibility: str | None = 'public') -> Lowkey:
-    row = Lowkey(owner_id=owner_id, title=title, visibility=visibility or 'public')
-    db.add(row)
-    await db.commit()
-    await db.refresh(row)
+    from ratemate_app.services.media import acquire_blob
+    url, media_type = await acquire_blob(db, file)
 
-    from ratemate_app.services.media import upload_lowkey_media
-    url, media_type = await upload_lowkey_media(row.id, file)
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=settings.LOWKEY_TTL_HOURS)
+    row = Lowkey(owner_id=owner_id, title=title, visibility=visibility or 'public', media_url=url, media_type=media_type, expires_at=expires_at)
+    db.add(row)
+    await db.flush()
 
-    row.media_url = url
-    row.media_type = media_type
-    
-    await db.commit()
-    await db.refresh(row)
+    from ratemate_app.services.timeline import fan_out_lowkey
+    await fan_out_lowkey(db, row)
     return row
 
 async def delete_lowkey(db: AsyncSession, lowkey: Lowkey) -> None:
-    from ratemate_app.services.media import delete_lowkey_media_blob
+    from ratemate_app.services.media import release_blob
 
-    if lowkey.media_url:
-        await delete_lowkey_media_blob(lowkey.media_url)
+    await release_blob(db, lowkey.media_url)
     await db.execute(delete(Lowkey).where(Lowkey.id == lowkey.id))
-    await db.commit()
+
+    from ratemate_app.services.lowkey_views import forget_lowkey_views
+    on_commit(db, forget_lowkey_views, lowkey.id)
 
 async def get_lowkey(db: AsyncSession, lowkey_id: int) -> Lowkey | None:
-    q = await db.execute(select(Lowkey).where(Lowkey.id == lowkey_id, Lowkey.is_active == True))
+    q = await db.execute(select(Lowkey).where(Lowkey.id == lowkey_id, Lowkey.is_active == True, Lowkey.expires_at > func.now()))
     return q.scalar_one_or_none()
 
-async def mark_view(db: AsyncSession, lowkey_id: int, viewer_id: int) -> None:
-    existing = await db.execute(select(LowkeyView).where(LowkeyView.lowkey_id == lowkey_id, LowkeyView.viewer_id == viewer_id))
-    if existing.scalar_one_or_none():
-        return
-
-    v = LowkeyView(lowkey_id=lowkey_id, viewer_id=viewer_id)
-    db.add(v)
-    await db.commit()
-
-async def list_public_active_lowkeys(db: AsyncSession, limit: int = 50, offset: int = 0) -> list[Lowkey]:
+async def list_public_active_lowkeys(db: AsyncSession, limit: int = 50, offset: int = 0) -> list[RowMapping]:
     q = await db.execute(
-        select(Lowkey)
-        .where(Lowkey.is_active == True)
+        select(*LOWKEY_READ_COLUMNS)
+        .where(Lowkey.is_active == True, Lowkey.expires_at > func.now())
         .where(Lowkey.visibility == 'public')
         .order_by(Lowkey.created_at.desc())
         .limit(limit)
         .offset(offset)
     )
 
-    return q.scalars().all()
+    return q.mappings().all()
+
+async def list_following_active_lowkeys(db: AsyncSession, user_id: int, limit: int = 50, offset: int = 0) -> list[RowMapping]:
+    from ratemate_app.services.timeline import read_lowkey_timeline
+    return await read_lowkey_timeline(db, user_id, limit, offset)
+
+def encode_view_cursor(viewed_at: datetime, view_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{viewed_at.isoformat()}|{view_id}".encode()).decode()
 
-async def list_following_active_lowkeys(db: AsyncSession, user_id: int, limit: int = 50, offset: int = 0) -> list[Lowkey]:
-    q = await db.execute(select(Lowkey)
-                         .join(Follow, Follow.followed_id == Lowkey.owner_id)
-                         .where(Follow.follower_id == user_id)
-                         .where(Lowkey.is_active == True)
-                         .order_by(Lowkey.created_at.desc())
-                         .limit(limit)
-                         .offset(offset))
+def decode_view_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        viewed_at, view_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(viewed_at), int(view_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid_cursor")
 
-    return q.scalars().all()
+async def list_views(db: AsyncSession, lowkey_id: int, limit: int = 50, before: tuple[datetime, int] | None = None) -> list[tuple[int, str, datetime, int]]:
+    stmt = (select(LowkeyView.viewer_id, User.username, LowkeyView.viewed_at, LowkeyView.id)
+            .join(User, User.id == LowkeyView.viewer_id)
+            .where(LowkeyView.lowkey_id == lowkey_id))
+    if before is not None:
+        stmt = stmt.where(tuple_(LowkeyView.viewed_at, LowkeyView.id) < tuple_(*before))
 
-async def list_views(db: AsyncSession, lowkey_id: int) -> list[tuple[int, str, datetime]]:
-    q = await db.execute(select(LowkeyView.viewer_id, User.username, LowkeyView.viewed_at)
-                         .join(User, User.id == LowkeyView.viewer_id)
-                         .where(LowkeyView.lowkey_id == lowkey_id)
-                         .order_by(LowkeyView.viewed_at.desc()))
+    q = await db.execute(stmt.order_by(LowkeyView.viewed_at.desc(), LowkeyView.id.desc()).limit(limit))
     return q.all()
 
-async def expire_lowkeys(db: AsyncSession) -> None:
-    await db.execute(_text("UPDATE lowkeys SET is_active = FALSE WHERE is_active = TRUE AND created_at < now() - interval '24 hours'"))
-    await db.commit()
+async def expire_lowkeys(db: AsyncSession, batch_size: int) -> int | None:
+    from ratemate_app.services.timeline import prune_lowkey_timeline
+
+    total = 0
+    while True:
+        locked = await db.execute(select(func.pg_try_advisory_xact_lock(_EXPIRER_LOCK_KEY)))
+        if not locked.scalar_one():
+            await db.rollback()
+            return None if total == 0 else total
+
+        batch = (
+            select(Lowkey.id)
+            .where(Lowkey.is_active == True, Lowkey.expires_at <= func.now())
+            .order_by(Lowkey.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        q = await db.execute(update(Lowkey).where(Lowkey.id.in_(batch)).values(is_active=False).returning(Lowkey.id))
+        ids = q.scalars().all()
+        await prune_lowkey_timeline(db, ids)
+        await db.commit()
+
+        total += len(ids)
+        if len(ids) < batch_size:
+            return total
+
+async def next_lowkey_expiry(db: AsyncSession) -> datetime | None:
+    q = await db.execute(select(func.min(Lowkey.expires_at)).where(Lowkey.is_active == True))
+    return q.scalar_one_or_none()
 
 async def run_lowkey_expirer(session_factory) -> None:
+    interval = settings.LOWKEY_EXPIRY_INTERVAL_SECONDS
     while True:
+        delay = interval
         try:
             async with session_factory() as db:
-                await expire_lowkeys(db)
+                expired = await expire_lowkeys(db, settings.LOWKEY_EXPIRY_BATCH_SIZE)
+                next_at = await next_lowkey_expiry(db)
+
+            if expired is None:
+                lowkey_expiry_runs_total.inc(result="skipped")
+            else:
+                lowkey_expiry_runs_total.inc(result="ok")
+                lowkeys_expired_total.inc(expired)
+                lowkey_expiry_last_run.set(datetime.now(timezone.utc).timestamp())
+                if expired:
+                    logger.info("Expired %s lowkeys", expired)
+
+            if next_at is not None:
+                until_next = (next_at - datetime.now(timezone.utc)).total_seconds()
+                delay = min(max(until_next, 1.0), interval)
         except Exception:
-            pass
-        await asyncio.sleep(300)
\ No newline at end of file
+            lowkey_expiry_runs_total.inc(result="error")
+            logger.exception("Lowkey expiry run failed")
+        await asyncio.sleep(delay)
@@ -0,0 +1,139 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, values, column, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from collections import OrderedDict, Counter
+
+import asyncio
+import logging
+
+from ratemate_app.core.cache import TTLCache
+from ratemate_app.core.config import settings
+from ratemate_app.models.lowkey import Lowkey, LowkeyView
+from ratemate_app.models.user import User
+from ratemate_app.services.lowkey import list_views, encode_view_cursor, decode_view_cursor
+
+logger = logging.getLogger(__name__)
+
+_pending: dict[int, set[int]] = {}
+_pending_size = 0
+_seen: OrderedDict[int, set[int]] = OrderedDict()
+_flush_requested = asyncio.Event()
+_recent_viewers = TTLCache(maxsize=settings.LOWKEY_VIEW_SEEN_MAX_LOWKEYS, ttl=settings.LOWKEY_RECENT_VIEWERS_TTL_SECONDS)
+
+def record_view(lowkey_id: int, viewer_id: int) -> None:
+    global _pending_size
+
+    seen = _seen.get(lowkey_id)
+    if seen is None:
+        seen = _seen[lowkey_id] = set()
+        while len(_seen) > settings.LOWKEY_VIEW_SEEN_MAX_LOWKEYS:
+            _seen.popitem(last=False)
+    else:
+        _seen.move_to_end(lowkey_id)
+
+    if viewer_id in seen:
+        return
+    if len(seen) < settings.LOWKEY_VIEW_SEEN_MAX_PER_LOWKEY:
+        seen.add(viewer_id)
+
+    viewers = _pending.setdefault(lowkey_id, set())
+    if viewer_id not in viewers:
+        viewers.add(viewer_id)
+        _pending_size += 1
+        if _pending_size >= settings.LOWKEY_VIEW_FLUSH_BATCH_SIZE:
+            _flush_requested.set()
+
+def get_live_view_count(lowkey: Lowkey) -> int:
+    return (lowkey.view_count or 0) + len(_pending.get(lowkey.id, ()))
+
+def forget_lowkey_views(lowkey_id: int) -> None:
+    _seen.pop(lowkey_id, None)
+    _recent_viewers.pop(lowkey_id)
+
+async def get_views_page(db: AsyncSession, lowkey: Lowkey, limit: int = 50, cursor: str | None = None) -> dict:
+    head_size = settings.LOWKEY_RECENT_VIEWERS_LIMIT
+    if cursor is None and limit <= head_size:
+        rows = _recent_viewers.get(lowkey.id)
+        if rows is None:
+            rows = await list_views(db, lowkey.id, head_size + 1)
+            _recent_viewers.set(lowkey.id, rows)
+    else:
+        before = decode_view_cursor(cursor) if cursor is not None else None
+        rows = await list_views(db, lowkey.id, limit + 1, before)
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        _, _, viewed_at, view_id = page[-1]
+        next_cursor = encode_view_cursor(viewed_at, view_id)
+
+    return {
+        "view_count": get_live_view_count(lowkey),
+        "items": [{"viewer_id": vid, "username": uname, "viewed_at": vt} for (vid, uname, vt, _) in page],
+        "next_cursor": next_cursor,
+    }
+
+async def flush_views(db: AsyncSession) -> int:
+    global _pending, _pending_size
+
+    batch, _pending, _pending_size = _pending, {}, 0
+    if not batch:
+        return 0
+
+    try:
+        # lowkeys and viewers deleted since the view would fail the FK and requeue the batch forever
+        existing = await db.execute(select(Lowkey.id).where(Lowkey.id.in_(list(batch.keys()))))
+        live_ids = set(existing.scalars().all())
+        existing = await db.execute(select(User.id).where(User.id.in_(list(set().union(*batch.values())))))
+        live_viewers = set(existing.scalars().all())
+        rows = [{"lowkey_id": lid, "viewer_id": vid} for lid, viewers in batch.items() if lid in live_ids for vid in viewers if vid in live_viewers]
+
+        inserted: Counter[int] = Counter()
+        chunk_size = settings.LOWKEY_VIEW_FLUSH_BATCH_SIZE
+        for start in range(0, len(rows), chunk_size):
+            q = await db.execute(
+                pg_insert(LowkeyView)
+                .values(rows[start:start + chunk_size])
+                .on_conflict_do_nothing(constraint="uq_lowkey_view_unique")
+                .returning(LowkeyView.lowkey_id)
+            )
+            inserted.update(q.scalars().all())
+
+        if inserted:
+            # sorted so concurrent flushes from several workers lock lowkey rows in the same order
+            increments = values(column("id", Integer), column("n", Integer), name="increments").data(sorted(inserted.items()))
+            await db.execute(
+                update(Lowkey)
+                .where(Lowkey.id == increments.c.id)
+                .values(view_count=Lowkey.view_count + increments.c.n)
+            )
+        await db.commit()
+        for lid in inserted:
+            _recent_viewers.pop(lid)
+    except Exception:
+        await db.rollback()
+        for lid, viewers in batch.items():
+            _pending.setdefault(lid, set()).update(viewers)
+        _pending_size = sum(len(v) for v in _pending.values())
+        raise
+
+    return sum(inserted.values())
+
+async def run_view_flusher(session_factory) -> None:
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(_flush_requested.wait(), timeout=settings.LOWKEY_VIEW_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _flush_requested.clear()
+
+            try:
+                async with session_factory() as db:
+                    await flush_views(db)
+            except Exception:
+                logger.exception("Lowkey view flush failed")
+    finally:
+        if _pending:
+            async with session_factory() as db:
+                await flush_views(db)
@@ -1,28 +1,42 @@
-from typing import Optional
-from uuid import uuid4
+from typing import Optional, TYPE_CHECKING
+from collections import Counter
 from urllib.parse import urlparse
+from datetime import datetime, timedelta, timezone
+
+import asyncio
+import hashlib
+import logging
+import uuid
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from fastapi import UploadFile
 
-from azure.storage.blob.aio import BlobServiceClient
-from azure.storage.blob import ContentSettings
-from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
-
 from ratemate_app.core.config import settings
-from ratemate_app.models.media import Media
+from ratemate_app.core.response_cache import invalidate
+from ratemate_app.db.session import on_commit
+from ratemate_app.models.media import Media, MediaBlob
+from ratemate_app.models.blob_deletion import BlobDeletion
+
+if TYPE_CHECKING:
+    from azure.storage.blob.aio import ContainerClient
 
-_container_client: Optional[BlobServiceClient] = None
+logger = logging.getLogger(__name__)
 
-def _sanitize_filename(name: str) -> str:
-    return name.replace("\\", "/").split("/")[-1]
+_container_client: Optional["ContainerClient"] = None
 
 async def _get_container_client():
+    global _container_client
     if not settings.AZURE_STORAGE_CONNECTION_STRING or not settings.AZURE_STORAGE_CONTAINER:
         raise RuntimeError("Azure storage settings are not configured")
-    
+    if _container_client is not None:
+        return _container_client
+
+    from azure.storage.blob.aio import BlobServiceClient
+    from azure.core.exceptions import ResourceExistsError
+
     service = BlobServiceClient.from_connection_string(settings.AZURE_STORAGE_CONNECTION_STRING)
     container = service.get_container_client(settings.AZURE_STORAGE_CONTAINER)
 
@@ -30,29 +44,138 @@ async def _get_container_client():
         await container.create_container()
     except ResourceExistsError:
         pass
+    _container_client = container
     return container
 
+def _blob_name_from_url(url: str) -> str:
+    path = urlparse(url).path
+    prefix = "/" + settings.AZURE_STORAGE_CONTAINER + "/"
+    return path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
 
-async def upload_media(db: AsyncSession, post_id: int, file: UploadFile) -> Media:
-    container = await _get_container_client()
-    filename = _sanitize_filename(file.filename or "file")
-    blob_name = f"posts/{post_id}/{uuid4()}-{filename}"
-    blob_client = container.get_blob_client(blob_name)
-    data = await file.read()
+def _media_type(content_type: str | None) -> str:
+    content_type = content_type or ""
+    return "image" if content_type.startswith("image/") else ("video" if content_type.startswith("video/") else "file")
+
+async def _delete_blob(container, url: str) -> None:
+    from azure.core.exceptions import ResourceNotFoundError
+
+    try:
+        await container.delete_blob(_blob_name_from_url(url), delete_snapshots="include")
+    except (ResourceNotFoundError, ValueError):
+        return
 
-    media_type = "image" if (file.content_type or "").startswith("image/") else ("video" if (file.content_type or "").startswith("video/") else "file")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+async def _hash_upload(file: UploadFile) -> tuple[str, int]:
+    # the upload is already spooled locally, so hashing it first is cheap next to sending a duplicate to storage
+    digest = hashlib.sha256()
+    size = 0
+    await file.seek(0)
+    while chunk := await file.read(_HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    await file.seek(0)
+    return digest.hexdigest(), size
+
+async def _acquire_hashed_blob(db: AsyncSession, file: UploadFile, content_hash: str, size: int) -> MediaBlob:
+    # taking the reference locks the row, and release_blob only deletes it while ref_count is still <= 0,
+    # so a blob is either kept alive by this upload or already gone and uploaded again under a new name
+    q = await db.execute(
+        update(MediaBlob)
+        .where(MediaBlob.content_hash == content_hash)
+        .values(ref_count=MediaBlob.ref_count + 1)
+        .returning(MediaBlob)
+    )
+    blob = q.scalar_one_or_none()
+    if blob:
+        return blob
+
+    from azure.storage.blob import ContentSettings
+
+    # a fresh name per upload, so a url queued for deletion is never written again
+    content_type = file.content_type or "application/octet-stream"
+    container = await _get_container_client()
+    blob_client = container.get_blob_client(f"blobs/{uuid.uuid4().hex}")
     await blob_client.upload_blob(
-        data,
-        overwrite=True,
-        content_settings=ContentSettings(content_type=file.content_type or "application/octet-stream"),
+        file.file,
+        length=size,
+        overwrite=False,
+        content_settings=ContentSettings(content_type=content_type),
+    )
+
+    stmt = pg_insert(MediaBlob).values(
+        content_hash=content_hash,
+        url=blob_client.url,
+        content_type=content_type,
+        size=size,
+        ref_count=1,
     )
+    q = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[MediaBlob.content_hash],
+            set_={"ref_count": MediaBlob.ref_count + 1},
+        ).returning(MediaBlob)
+    )
+    blob = q.scalar_one()
+    if blob.url != blob_client.url:
+        # a concurrent upload stored the same content first, keep theirs and drop our copy
+        enqueue_blob_deletion(db, blob_client.url)
+    return blob
+
+async def acquire_blob(db: AsyncSession, file: UploadFile) -> tuple[str, str]:
+    content_hash, size = await _hash_upload(file)
+    blob = await _acquire_hashed_blob(db, file, content_hash, size)
+    return blob.url, _media_type(file.content_type)
+
+def enqueue_blob_deletion(db: AsyncSession, url: str | None) -> None:
+    if not url:
+        return
+    db.add(BlobDeletion(url=url))
 
-    url = blob_client.url
-    media = Media(post_id=post_id, url=url, media_type=media_type)
+async def release_blob(db: AsyncSession, url: str | None, count: int = 1) -> None:
+    if not url:
+        return
+
+    q = await db.execute(
+        update(MediaBlob)
+        .where(MediaBlob.url == url)
+        .values(ref_count=MediaBlob.ref_count - count)
+        .returning(MediaBlob.id, MediaBlob.ref_count)
+    )
+    row = q.first()
+    if row is None:
+        enqueue_blob_deletion(db, url)
+        return
+    if row.ref_count > 0:
+        return
+
+    q = await db.execute(delete(MediaBlob).where(MediaBlob.id == row.id, MediaBlob.ref_count <= 0).returning(MediaBlob.id))
+    if q.first() is not None:
+        enqueue_blob_deletion(db, url)
+
+async def release_blobs(db: AsyncSession, urls: list[str]) -> None:
+    for url, count in Counter(urls).items():
+        await release_blob(db, url, count)
+
+async def release_media_blobs(db: AsyncSession, *criteria) -> None:
+    q = await db.execute(select(Media.url).where(*criteria))
+    await release_blobs(db, q.scalars().all())
+
+
+async def upload_media(db: AsyncSession, post_id: int, file: UploadFile) -> Media:
+    content_hash, size = await _hash_upload(file)
+    existing = await db.execute(select(Media).where(Media.post_id == post_id, Media.content_hash == content_hash))
+    row = existing.scalars().first()
+    if row:
+        return row
+
+    blob = await _acquire_hashed_blob(db, file, content_hash, size)
+
+    media = Media(post_id=post_id, url=blob.url, media_type=_media_type(file.content_type), content_hash=content_hash)
 
     db.add(media)
-    await db.commit()
-    await db.refresh(media)
+    await db.flush()
+    on_commit(db, invalidate, f"post:{post_id}")
     return media
 
 
@@ -61,72 +184,56 @@ async def list_post_media(db: AsyncSession, post_id: int) -> list[Media]:
     return result.scalars().all()
 
 
+async def list_media_for_posts(db: AsyncSession, post_ids: list[int]) -> dict[int, list[Media]]:
+    grouped: dict[int, list[Media]] = {}
+    if not post_ids:
+        return grouped
+    result = await db.execute(select(Media).where(Media.post_id.in_(post_ids)).order_by(Media.id))
+    for media in result.scalars().all():
+        grouped.setdefault(media.post_id, []).append(media)
+    return grouped
+
+
 async def delete_media(db: AsyncSession, media_id: int) -> None:
     media = await db.get(Media, media_id)
     if not media:
         return
-    
-    container = await _get_container_client()
-    try:
-        path = urlparse(media.url).path
-        prefix = "/" + settings.AZURE_STORAGE_CONTAINER + "/"
-        blob_name = path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
-        await container.delete_blob(blob_name, delete_snapshots="include")
-
-    except (ResourceNotFoundError, ValueError):
-        pass
 
+    await release_blob(db, media.url)
     await db.execute(delete(Media).where(Media.id == media_id))
-    await db.commit()
+    on_commit(db, invalidate, f"post:{media.post_id}" if media.post_id else f"comment:{media.comment_id}")
 
 async def delete_all_post_media_blobs(db: AsyncSession, post_id: int) -> None:
-    medias = await list_post_media(db, post_id)
-    if not medias:
-        return
-    
-    container = await _get_container_client()
-    for m in medias:
-        try:
-            path = urlparse(m.url).path
-            prefix = "/" + settings.AZURE_STORAGE_CONTAINER + "/"
-            blob_name = path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
-            await container.delete_blob(blob_name, delete_snapshots="include")
-        except (ResourceNotFoundError, ValueError):
-            continue
-
+    await release_media_blobs(db, Media.post_id == post_id)
     await db.execute(delete(Media).where(Media.post_id == post_id))
-    await db.commit()
+    on_commit(db, invalidate, f"post:{post_id}")
 
 async def upload_media_bulk(db: AsyncSession, post_id: int, files: list[UploadFile]) -> list[Media]:
     if not files:
         return []
     if len(files) > 5:
         raise ValueError("too_many_files")
-    
+
     result: list[Media] = []
     for f in files:
         result.append(await upload_media(db, post_id, f))
-    
+
     return result
 
 
 async def upload_comment_media(db: AsyncSession, comment_id: int, file: UploadFile) -> Media:
-    container = await _get_container_client()
-    filename = _sanitize_filename(file.filename or "file")
-    blob_name = f"comments/{comment_id}/{uuid4()}-{filename}"
-    blob_client = container.get_blob_client(blob_name)
-    data = await file.read()
-    media_type = "image" if (file.content_type or "").startswith("image/") else ("video" if (file.content_type or "").startswith("video/") else "file")
-    await blob_client.upload_blob(
-        data,
-        overwrite=True,
-        content_settings=ContentSettings(content_type=file.content_type or "application/octet-stream"),
-    )
-    url = blob_client.url
-    media = Media(comment_id=comment_id, url=url, media_type=media_type)
+    content_hash, size = await _hash_upload(file)
+    existing = await db.execute(select(Media).where(Media.comment_id == comment_id, Media.content_hash == content_hash))
+    row = existing.scalars().first()
+    if row:
+        return row
+
+    blob = await _acquire_hashed_blob(db, file, content_hash, size)
+
+    media = Media(comment_id=comment_id, url=blob.url, media_type=_media_type(file.content_type), content_hash=content_hash)
     db.add(media)
-    await db.commit()
-    await db.refresh(media)
+    await db.flush()
+    on_commit(db, invalidate, f"comment:{comment_id}")
     return media
 
 async def upload_comment_media_bulk(db: AsyncSession, comment_id: int, files: list[UploadFile]) -> list[Media]:
@@ -136,78 +243,86 @@ async def upload_comment_media_bulk(db: AsyncSession, comment_id: int, files: li
         raise ValueError("too_many_files")
     return [await upload_comment_media(db, comment_id, f) for f in files]
 
-async def upload_user_avatar(user_id: int, file: UploadFile) -> tuple[str, str]:
-    container = await _get_container_client()
-    filename = _sanitize_filename(file.filename or "avatar")
-    blob_name = f"users/{user_id}/avatar/{uuid4()}-{filename}"
-    blob_client = container.get_blob_client(blob_name)
-    data = await file.read()
-    media_type = "image" if (file.content_type or "").startswith("image/") else ("video" if (file.content_type or "").startswith("video/") else "file")
+async def list_comment_media(db: AsyncSession, comment_id: int) -> list[Media]:
+    result = await db.execute(select(Media).where(Media.comment_id == comment_id))
+    return result.scalars().all()
 
-    await blob_client.upload_blob(
-        data,
-        overwrite=True,
-        content_settings=ContentSettings(content_type=file.content_type or "application/octet-stream")
+async def _list_media_rows(db: AsyncSession, column, ids: list[int]) -> dict[int, list[dict]]:
+    grouped: dict[int, list[dict]] = {}
+    if not ids:
+        return grouped
+    result = await db.execute(
+        select(Media.id, Media.post_id, Media.comment_id, Media.url, Media.media_type, Media.created_at)
+        .where(column.in_(ids))
+        .order_by(Media.id)
     )
-    return blob_client.url, media_type
+    for row in result.mappings().all():
+        grouped.setdefault(row[column.key], []).append(dict(row))
+    return grouped
 
-async def delete_user_avatar_blob(url: str) -> None:
-    if not url:
-        return
-    container = await _get_container_client()
-    try:
-        path = urlparse(url).path
-        prefix = "/" + settings.AZURE_STORAGE_CONTAINER + "/"
-        blob_name = path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
+async def list_media_rows_for_posts(db: AsyncSession, post_ids: list[int]) -> dict[int, list[dict]]:
+    return await _list_media_rows(db, Media.post_id, post_ids)
 
-        await container.delete_blob(blob_name, delete_snapshots="include")
-    except(ResourceNotFoundError, ValueError):
-        return
-
-async def upload_lowkey_media(lowkey_id: int, file: UploadFile) -> tuple[str, str]:
-    container = await _get_container_client()
-    filename = _sanitize_filename(file.filename or "media")
-    blob_name = f"users/{user_id}/avatar/{uuid4()}-{filename}"
-    blob_client = container.get_blob_client(blob_name)
-    data = await file.read()
-    media_type = "image" if (file.content_type or "").startswith("image/") else ("video" if (file.content_type or "").startswith("video/") else "file")
+async def list_media_rows_for_comments(db: AsyncSession, comment_ids: list[int]) -> dict[int, list[dict]]:
+    return await _list_media_rows(db, Media.comment_id, comment_ids)
 
-    await blob_client.upload_blob(
-        data,
-        overwrite=True,
-        content_settings=ContentSettings(content_type=file.content_type or "application/octet-stream"),
+async def delete_all_comment_media_blobs(db: AsyncSession, comment_id: int) -> None:
+    await release_media_blobs(db, Media.comment_id == comment_id)
+    await db.execute(delete(Media).where(Media.comment_id == comment_id))
+    on_commit(db, invalidate, f"comment:{comment_id}")
+
+async def drain_blob_deletions(db: AsyncSession, batch_size: int) -> int:
+    q = await db.execute(
+        select(BlobDeletion)
+        .where(BlobDeletion.next_attempt_at <= datetime.now(timezone.utc))
+        .order_by(BlobDeletion.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
     )
-    return blob_client.url, media_type
+    rows = q.scalars().all()
+    if not rows:
+        return 0
+
+    # a url is only queued once its media_blobs row is deleted (or lost the insert race), and uploads never
+    # reuse a name, so nothing can start referencing it again between this check and the delete
+    referenced = await db.execute(select(MediaBlob.url).where(MediaBlob.url.in_({row.url for row in rows})))
+    referenced_urls = set(referenced.scalars().all())
+    pending = [row for row in rows if row.url not in referenced_urls]
 
-async def delete_lowkey_media_blob(url: str) -> None:
-    if not url:
-        return
     container = await _get_container_client()
-    try:
-        path = urlparse(url).path
-        prefix = "/" + settings.AZURE_STORAGE_CONTAINER + "/"
-        blob_name = path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
-        await container.delete_blob(blob_name, delete_snapshots="include")
-    except (ResourceNotFoundError, ValueError):
-        return
-    
+    results = await asyncio.gather(*(_delete_blob(container, row.url) for row in pending), return_exceptions=True)
 
-async def list_comment_media(db: AsyncSession, comment_id: int) -> list[Media]:
-    result = await db.execute(select(Media).where(Media.comment_id == comment_id))
-    return result.scalars().all()
+    done: list[int] = [row.id for row in rows if row.url in referenced_urls]
+    for row, result in zip(pending, results):
+        if not isinstance(result, Exception):
+            done.append(row.id)
+            continue
 
-async def delete_all_comment_media_blobs(db: AsyncSession, comment_id: int) -> None:
-    medias = await list_comment_media(db, comment_id)
-    if not medias:
-        return 
-    container = await _get_container_client()
-    for m in medias:
+        row.attempts += 1
+        row.last_error = str(result)[:500]
+        if row.attempts >= settings.BLOB_DELETE_MAX_ATTEMPTS:
+            logger.error("Giving up on blob deletion %s after %s attempts: %s", row.url, row.attempts, row.last_error)
+            done.append(row.id)
+        else:
+            row.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=2 ** row.attempts * settings.BLOB_DELETE_INTERVAL_SECONDS)
+
+    if done:
+        await db.execute(delete(BlobDeletion).where(BlobDeletion.id.in_(done)))
+    await db.commit()
+    return len(rows)
+
+async def run_blob_deleter(session_factory) -> None:
+    if not settings.AZURE_STORAGE_CONNECTION_STRING or not settings.AZURE_STORAGE_CONTAINER:
+        logger.warning("Azure storage settings are not configured, blob deletion worker disabled")
+        return
+
+    batch_size = settings.BLOB_DELETE_BATCH_SIZE
+    while True:
+        processed = 0
         try:
-            path = urlparse(m.url).path
-            prefix = "/" + settings.AZURE_STORAGE_CONTAINER + "/"
-            blob_name = path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
-            await container.delete_blob(blob_name, delete_snapshots="include")
-        except (ResourceNotFoundError, ValueError):
-            continue
-    await db.execute(delete(Media).where(Media.comment_id == comment_id))
-    await db.commit()
\ No newline at end of file
+            async with session_factory() as db:
+                processed = await drain_blob_deletions(db, batch_size)
+        except Exception:
+            logger.exception("Blob deletion batch failed")
+        if processed < batch_size:
+            await asyncio.sleep(settings.BLOB_DELETE_INTERVAL_SECONDS)
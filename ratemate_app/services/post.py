@@ -1,15 +1,53 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete
+from sqlalchemy import select, delete, func, or_, RowMapping
+from sqlalchemy.orm import joinedload, noload
 from ratemate_app.models.post import Post
+from ratemate_app.models.comment import Comment
+from ratemate_app.models.media import Media
+from ratemate_app.models.rating import Rating
 from ratemate_app.schemas.post import PostCreate
+from ratemate_app.core.response_cache import invalidate
+from ratemate_app.db.session import on_commit
 
 async def create_post(db: AsyncSession, owner_id: int, data: PostCreate) -> Post:
-    post = Post(owner_id=owner_id, title=data.title, content=data.content)
+    post = Post(owner_id=owner_id, title=data.title, content=data.content, media=[])
     db.add(post)
-    await db.commit()
-    await db.refresh(post)
+    await db.flush()
     return post
 
+async def get_post_for_read(db: AsyncSession, post_id: int, include_media: bool = True, include_rating: bool = False) -> tuple[Post, float | None, int | None] | None:
+    columns = [Post]
+    if include_rating:
+        columns.append(select(func.avg(Rating.score)).where(Rating.post_id == Post.id).scalar_subquery())
+        columns.append(select(func.count(Rating.id)).where(Rating.post_id == Post.id).scalar_subquery())
+
+    stmt = select(*columns).where(Post.id == post_id)
+    stmt = stmt.options(joinedload(Post.media) if include_media else noload(Post.media))
+
+    q = await db.execute(stmt)
+    row = q.unique().first()
+    if row is None:
+        return None
+    if include_rating:
+        post, avg, cnt = row
+        return post, float(avg) if avg is not None else 0.0, int(cnt)
+    return row[0], None, None
+
+async def get_posts_by_ids(db: AsyncSession, post_ids: list[int]) -> list[RowMapping]:
+    if not post_ids:
+        return []
+    q = await db.execute(
+        select(Post.id, Post.owner_id, Post.title, Post.content, Post.created_at)
+        .where(Post.id.in_(post_ids))
+    )
+    rows = {row["id"]: row for row in q.mappings().all()}
+    return [rows[pid] for pid in dict.fromkeys(post_ids) if pid in rows]
+
 async def delete_post(db: AsyncSession, post: Post) -> None:
+    from ratemate_app.services.media import release_media_blobs
+
+    await release_media_blobs(db, or_(Media.post_id == post.id, Media.comment_id.in_(select(Comment.id).where(Comment.post_id == post.id))))
+    comment_ids = (await db.execute(select(Comment.id).where(Comment.post_id == post.id))).scalars().all()
     await db.execute(delete(Post).where(Post.id == post.id))
-    await db.commit()
\ No newline at end of file
+    # comments go with the post through the FK cascade, their cached reads have to go too
+    on_commit(db, invalidate, f"post:{post.id}", f"post:{post.id}:rating", *(f"comment:{cid}{suffix}" for cid in comment_ids for suffix in ("", ":rating")))
\ No newline at end of file
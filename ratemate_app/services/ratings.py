@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, delete
 from ratemate_app.models.rating import Rating
+from ratemate_app.core.response_cache import invalidate
+from ratemate_app.db.session import on_commit
 
 async def set_post_rating(db: AsyncSession, user_id: int, post_id: int, score: int) -> Rating:
     existing = await db.execute(select(Rating).where(Rating.user_id == user_id, Rating.post_id == post_id))
@@ -9,14 +11,14 @@ async def set_post_rating(db: AsyncSession, user_id: int, post_id: int, score: i
 
     if row:
         row.score = score
-        await db.commit()
-        await db.refresh(row)
+        await db.flush()
+        on_commit(db, invalidate, f"post:{post_id}", f"post:{post_id}:rating")
         return row
     
     rating = Rating(user_id=user_id, post_id=post_id, score=score)
     db.add(rating)
-    await db.commit()
-    await db.refresh(rating)
+    await db.flush()
+    on_commit(db, invalidate, f"post:{post_id}", f"post:{post_id}:rating")
     return rating
 
 async def set_comment_rating(db: AsyncSession, user_id: int, comment_id: int, score: int) -> Rating:
@@ -26,14 +28,14 @@ async def set_comment_rating(db: AsyncSession, user_id: int, comment_id: int, sc
 
     if row:
         row.score = score
-        await db.commit()
-        await db.refresh(row)
+        await db.flush()
+        on_commit(db, invalidate, f"comment:{comment_id}:rating")
         return row
     
     rating = Rating(user_id=user_id, comment_id=comment_id, score=score)
     db.add(rating)
-    await db.commit()
-    await db.refresh(rating)
+    await db.flush()
+    on_commit(db, invalidate, f"comment:{comment_id}:rating")
     return rating
 
 async def get_post_rating_summary(db: AsyncSession, post_id: int) -> dict:
@@ -42,6 +44,26 @@ async def get_post_rating_summary(db: AsyncSession, post_id: int) -> dict:
     avg, cnt = q.one()
     return {"post_id": post_id, "average": float(avg) if avg is not None else 0.0, "count": int(cnt)}
 
+async def _rating_summaries(db: AsyncSession, column, key: str, ids: list[int]) -> dict[int, dict]:
+    summaries = {i: {key: i, "average": 0.0, "count": 0} for i in ids}
+    if not ids:
+        return summaries
+
+    q = await db.execute(
+        select(column, func.avg(Rating.score), func.count(Rating.id))
+        .where(column.in_(ids))
+        .group_by(column)
+    )
+    for i, avg, cnt in q.all():
+        summaries[i] = {key: i, "average": float(avg) if avg is not None else 0.0, "count": int(cnt)}
+    return summaries
+
+async def get_post_rating_summaries(db: AsyncSession, post_ids: list[int]) -> dict[int, dict]:
+    return await _rating_summaries(db, Rating.post_id, "post_id", post_ids)
+
+async def get_comment_rating_summaries(db: AsyncSession, comment_ids: list[int]) -> dict[int, dict]:
+    return await _rating_summaries(db, Rating.comment_id, "comment_id", comment_ids)
+
 async def get_comment_rating_summary(db: AsyncSession, comment_id: int) -> dict:
     q = await db.execute(select(func.avg(Rating.score), func.count(Rating.id)).where(Rating.comment_id == comment_id))
 
@@ -50,11 +72,11 @@ async def get_comment_rating_summary(db: AsyncSession, comment_id: int) -> dict:
 
 async def delete_post_rating(db: AsyncSession, user_id: int, post_id: int) -> None:
     await db.execute(delete(Rating).where(Rating.user_id == user_id, Rating.post_id == post_id))
-    await db.commit()
+    on_commit(db, invalidate, f"post:{post_id}", f"post:{post_id}:rating")
 
 async def delete_comment_rating(db: AsyncSession, user_id: int, comment_id: int) -> None:
     await db.execute(delete(Rating).where(Rating.user_id == user_id, Rating.comment_id == comment_id))
-    await db.commit()
+    on_commit(db, invalidate, f"comment:{comment_id}:rating")
 
 async def set_lowkey_rating(db: AsyncSession, user_id: int, lowkey_id: int, score: int) -> Rating:
     existing = await db.execute(select(Rating).where(Rating.user_id == user_id, Rating.lowkey_id == lowkey_id))
@@ -62,14 +84,12 @@ async def set_lowkey_rating(db: AsyncSession, user_id: int, lowkey_id: int, scor
 
     if row:
         row.score = score
-        await db.commit()
-        await db.refresh(row)
+        await db.flush()
 
     rating = Rating(user_id=user_id, lowkey_id=lowkey_id, score=score)
     
     db.add(rating)
-    await db.commit()
-    await db.refresh(rating)
+    await db.flush()
     return rating
 
 async def get_lowkey_rating_summary(db: AsyncSession, lowkey_id: int) -> dict:
@@ -79,4 +99,3 @@ async def get_lowkey_rating_summary(db: AsyncSession, lowkey_id: int) -> dict:
 
 async def delete_lowkey_rating(db: AsyncSession, user_id: int, lowkey_id: int) -> None:
     await db.execute(delete(Rating).where(Rating.user_id == user_id, Rating.lowkey_id == lowkey_id))
-    await db.commit()
@@ -0,0 +1,96 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, literal, RowMapping, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+
+from ratemate_app.core.config import settings
+from ratemate_app.models.lowkey import Lowkey
+from ratemate_app.models.follow import Follow
+from ratemate_app.models.user import User
+from ratemate_app.models.timeline import LowkeyTimeline
+from ratemate_app.services.follow_graph import get_visible_followees
+
+_TIMELINE_COLUMNS = ["user_id", "lowkey_id", "owner_id", "created_at"]
+
+LOWKEY_READ_COLUMNS = (
+    Lowkey.id, Lowkey.owner_id, Lowkey.title, Lowkey.media_url, Lowkey.media_type,
+    Lowkey.created_at, Lowkey.expires_at, Lowkey.view_count,
+)
+
+async def fan_out_lowkey(db: AsyncSession, lowkey: Lowkey) -> None:
+    q = await db.execute(select(User.follower_count).where(User.id == lowkey.owner_id))
+    if (q.scalar_one_or_none() or 0) > settings.LOWKEY_FANOUT_MAX_FOLLOWERS:
+        return
+
+    await db.execute(
+        pg_insert(LowkeyTimeline)
+        .from_select(
+            _TIMELINE_COLUMNS,
+            select(Follow.follower_id, literal(lowkey.id), literal(lowkey.owner_id), literal(lowkey.created_at))
+            .where(Follow.followed_id == lowkey.owner_id),
+        )
+        .on_conflict_do_nothing(constraint="uq_lowkey_timeline_entry")
+    )
+    lowkey.fanned_out = True
+
+async def add_followee_to_timeline(db: AsyncSession, follower_id: int, followed_id: int) -> None:
+    await add_followees_to_timeline(db, follower_id, [followed_id])
+
+async def add_followees_to_timeline(db: AsyncSession, follower_id: int, followed_ids: list[int]) -> None:
+    if not followed_ids:
+        return
+    await db.execute(
+        pg_insert(LowkeyTimeline)
+        .from_select(
+            _TIMELINE_COLUMNS,
+            select(literal(follower_id), Lowkey.id, Lowkey.owner_id, Lowkey.created_at)
+            .where(Lowkey.owner_id.in_(followed_ids), Lowkey.is_active == True, Lowkey.fanned_out == True)
+            .where(Lowkey.expires_at > func.now()),
+        )
+        .on_conflict_do_nothing(constraint="uq_lowkey_timeline_entry")
+    )
+
+async def remove_followee_from_timeline(db: AsyncSession, follower_id: int, followed_id: int) -> None:
+    await remove_followees_from_timeline(db, follower_id, [followed_id])
+
+async def remove_followees_from_timeline(db: AsyncSession, follower_id: int, followed_ids: list[int]) -> None:
+    if not followed_ids:
+        return
+    await db.execute(delete(LowkeyTimeline).where(LowkeyTimeline.user_id == follower_id, LowkeyTimeline.owner_id.in_(followed_ids)))
+
+async def read_lowkey_timeline(db: AsyncSession, user_id: int, limit: int = 50, offset: int = 0) -> list[RowMapping]:
+    window = offset + limit
+
+    pushed = await db.execute(
+        select(*LOWKEY_READ_COLUMNS)
+        .join(LowkeyTimeline, LowkeyTimeline.lowkey_id == Lowkey.id)
+        .where(LowkeyTimeline.user_id == user_id)
+        .where(Lowkey.is_active == True, Lowkey.expires_at > func.now())
+        .order_by(LowkeyTimeline.created_at.desc())
+        .limit(window)
+    )
+    merged = {row["id"]: row for row in pushed.mappings().all()}
+
+    # followers-only lowkeys come through here, so the cached graph is only used while it hears every unfollow
+    followees = await get_visible_followees(db, user_id)
+    if followees is None:
+        owners = Lowkey.owner_id.in_(select(Follow.followed_id).where(Follow.follower_id == user_id))
+    else:
+        owners = Lowkey.owner_id == any_(bindparam("followees", list(followees), type_=ARRAY(Integer)))
+    if followees is None or followees:
+        pulled = await db.execute(
+            select(*LOWKEY_READ_COLUMNS)
+            .where(owners)
+            .where(Lowkey.is_active == True, Lowkey.fanned_out == False, Lowkey.expires_at > func.now())
+            .order_by(Lowkey.created_at.desc())
+            .limit(window)
+        )
+        for row in pulled.mappings().all():
+            merged.setdefault(row["id"], row)
+
+    rows = sorted(merged.values(), key=lambda r: (r["created_at"], r["id"]), reverse=True)
+    return rows[offset:window]
+
+async def prune_lowkey_timeline(db: AsyncSession, lowkey_ids: list[int]) -> None:
+    if not lowkey_ids:
+        return
+    await db.execute(delete(LowkeyTimeline).where(LowkeyTimeline.lowkey_id.in_(lowkey_ids)))
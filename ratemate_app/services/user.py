@@ -1,41 +1,74 @@
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, or_
 
 from ratemate_app.schemas.user import UserCreate
 from ratemate_app.models.user import User
+from ratemate_app.models.follow import Follow
 from typing import Optional
+import asyncio
 from ratemate_app.auth.security import hash_password, verify_password
+from ratemate_app.core.response_cache import invalidate
+from ratemate_app.db.session import on_commit
 
 class _UpdateError(Exception):
         pass  
 
 class UserService:
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return hash_password(password)
+    async def get_password_hash(password: str) -> str:
+        return await asyncio.to_thread(hash_password, password)
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return verify_password(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.to_thread(verify_password, plain_password, hashed_password)
 
     @staticmethod
-    async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
-        hashed_password = UserService.get_password_hash(user_create.password)
+    async def create_user(db: AsyncSession, user: UserCreate) -> User:
+        hashed_password = await UserService.get_password_hash(user.password)
         db_user = User(
-            username=user_create.username,
-            email=user_create.email,
+            username=user.username,
+            email=user.email,
             hashed_password=hashed_password
         )
         db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
+        await db.flush()
         return db_user
 
     @staticmethod
     async def delete_user(db: AsyncSession, user: User) -> None:
+        from ratemate_app.models.post import Post
+        from ratemate_app.models.comment import Comment
+        from ratemate_app.models.media import Media
+        from ratemate_app.models.lowkey import Lowkey
+        from ratemate_app.models.rating import Rating
+        from ratemate_app.services.media import release_blobs
+        from ratemate_app.services.follow import adjust_follow_counts
+
+        # posts, comments, media, lowkeys and ratings all go with the user through FK cascades,
+        # so their blob references and cached reads have to be released here
+        post_ids = (await db.execute(select(Post.id).where(Post.owner_id == user.id))).scalars().all()
+        q = await db.execute(select(Comment.id).where(or_(Comment.user_id == user.id, Comment.post_id.in_(post_ids))))
+        comment_ids = q.scalars().all()
+        q = await db.execute(
+            select(Media.url).where(or_(Media.post_id.in_(post_ids), Media.comment_id.in_(comment_ids)))
+            .union_all(select(Lowkey.media_url).where(Lowkey.owner_id == user.id))
+        )
+        await release_blobs(db, [*q.scalars().all(), user.avatar_url])
+        q = await db.execute(select(Rating.post_id, Rating.comment_id).where(Rating.user_id == user.id, or_(Rating.post_id.isnot(None), Rating.comment_id.isnot(None))))
+        rated = q.all()
+
+        followed = (await db.execute(select(Follow.followed_id).where(Follow.follower_id == user.id))).scalars().all()
+        followers = (await db.execute(select(Follow.follower_id).where(Follow.followed_id == user.id))).scalars().all()
+        await adjust_follow_counts(db, {uid: -1 for uid in followers}, {uid: -1 for uid in followed})
         await db.execute(delete(User).where(User.id == user.id))
-        await db.commit()
+
+        resources = {f"avatar:{user.username}"}
+        resources.update(f"post:{pid}{suffix}" for pid in post_ids for suffix in ("", ":rating"))
+        resources.update(f"comment:{cid}{suffix}" for cid in comment_ids for suffix in ("", ":rating"))
+        for post_id, comment_id in rated:
+            resources.update((f"post:{post_id}", f"post:{post_id}:rating") if post_id else (f"comment:{comment_id}:rating",))
+        on_commit(db, invalidate, *resources)
 
     @staticmethod
     async def authenticate_user(db: AsyncSession, username_or_email: str, password: str) -> Optional[User]:
@@ -44,7 +77,7 @@ class UserService:
             return None
         if not user.is_active:
             return None
-        if not UserService.verify_password(password, user.hashed_password):
+        if not await UserService.verify_password(password, user.hashed_password):
             return None
         return user
     
@@ -67,37 +100,25 @@ class UserService:
         result = await db.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
 
-    @staticmethod
-    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-        result = await db.execute(select(User).where(User.email == email))
-        return result.scalar_one_or_none()
-    
-    @staticmethod
-    async def create_user(db: AsyncSession, user: UserCreate) -> User:
-        hash_password = UserService.get_password_hash(user.password)
-        db_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
-        db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
-        return db_user
     
     @staticmethod
     async def change_username_with_password(db: AsyncSession, user: User, new_username: str, password: str) -> User:
-        if not UserService.verify_password(password, user.hashed_password):
+        if not await UserService.verify_password(password, user.hashed_password):
             raise _UpdateError()
         
         existing = await db.execute(select(User).where(User.username == new_username))
         if existing.scalar_one_or_none():
             raise _UpdateError()
 
+        old_username = user.username
         user.username = new_username
-        await db.commit()
-        await db.refresh(user)
+        await db.flush()
+        on_commit(db, invalidate, f"avatar:{old_username}", f"avatar:{new_username}")
         return user
     
     @staticmethod
     async def change_email_with_password(db:AsyncSession, user: User, new_email: str, password: str) -> User:
-        if not UserService.verify_password(password, user.hashed_password):
+        if not await UserService.verify_password(password, user.hashed_password):
             raise _UpdateError()
 
         existing = await db.execute(select(User).where(User.email == new_email))
@@ -105,8 +126,7 @@ class UserService:
             raise _UpdateError()
             
         user.email = new_email
-        await db.commit()
-        await db.refresh(user)
+        await db.flush()
         return user
     
     @staticmethod
@@ -117,17 +137,16 @@ class UserService:
         if last_name is not None:
             user.last_name = last_name.strip() or None
             
-        await db.commit()
-        await db.refresh(user)
+        await db.flush()
         return user
     
     @staticmethod
-    async def update_avatar(db: AsyncSession, user: User, ur: str, media_type: str) -> User:
-        user.avatar_url = UnicodeTranslateError
+    async def update_avatar(db: AsyncSession, user: User, url: str, media_type: str) -> User:
+        user.avatar_url = url
         user.avatar_media_type = media_type
 
-        await db.commit()
-        await db.refresh(user)
+        await db.flush()
+        on_commit(db, invalidate, f"avatar:{user.username}")
         return user
     
     @staticmethod
@@ -135,6 +154,6 @@ class UserService:
         user.avatar_url = None
         user.avatar_media_type = None
 
-        await db.commit()
-        await db.refresh(user)
+        await db.flush()
+        on_commit(db, invalidate, f"avatar:{user.username}")
         return user
\ No newline at end of file
@@ -0,0 +1,81 @@
+import sys, uuid
+from datetime import timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+import pytest_asyncio
+
+from ratemate_app.auth.security import create_access_token
+from ratemate_app.core.config import settings
+from ratemate_app.core.query_detector import QueryReport, capture_query_reports
+from ratemate_app.db.session import init_db, engine, AsyncSessionLocal
+from ratemate_app.models.user import User
+
+
+class QueryBudget:
+    def __init__(self, reports: list[QueryReport]):
+        self.reports = reports
+
+    def for_route(self, route: str) -> list[QueryReport]:
+        return [r for r in self.reports if r.route == route]
+
+    def assert_within(self, route: str, max_queries: int) -> None:
+        reports = self.for_route(route)
+        assert reports, f"no requests recorded for {route}"
+        for report in reports:
+            assert report.queries <= max_queries, f"{route} ran {report.queries} queries, budget is {max_queries}"
+
+    def assert_clean(self) -> None:
+        for report in self.reports:
+            assert not report.over_budget, f"{report.route} ran {report.queries} queries, budget is {report.budget}"
+            assert not report.repeated, f"{report.route} repeated statements: {report.repeated}"
+
+
+@pytest.fixture
+def query_budget():
+    with capture_query_reports() as reports:
+        yield QueryBudget(reports)
+
+
+@pytest.fixture
+def admin_credentials(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_PANEL_KEY", "test-key")
+    monkeypatch.setattr(settings, "ADMIN_BASIC_USERNAME", "admin")
+    monkeypatch.setattr(settings, "ADMIN_BASIC_PASSWORD", "secret")
+    return {"auth": ("admin", "secret"), "headers": {"admin-key": "test-key"}}
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def fresh_engine():
+    # pooled connections belong to the event loop that opened them and every module runs its own loop
+    await engine.dispose()
+    await init_db()
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def make_user():
+    def make() -> User:
+        return User(username=f"tu_{uuid.uuid4().hex[:10]}", email=f"{uuid.uuid4().hex[:10]}@example.com", hashed_password="x")
+    return make
+
+
+@pytest.fixture
+def seed_users(make_user):
+    async def seed(count: int) -> list[User]:
+        async with AsyncSessionLocal() as db:
+            users = [make_user() for _ in range(count)]
+            db.add_all(users)
+            await db.commit()
+            return users
+    return seed
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user: User | str) -> dict:
+        username = user if isinstance(user, str) else user.username
+        return {"Authorization": f"Bearer {create_access_token({'sub': username}, timedelta(minutes=5))}"}
+    return headers
@@ -0,0 +1,78 @@
+import sys, uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from ratemate_app.main import app
+from ratemate_app.db.session import AsyncSessionLocal
+from ratemate_app.models.post import Post
+from ratemate_app.models.comment import Comment
+from ratemate_app.models.media import Media
+from ratemate_app.models.rating import Rating
+from ratemate_app.models.lowkey import Lowkey
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+@pytest.fixture
+def seed(seed_users):
+    async def seed_posts() -> tuple[list[int], int]:
+        owner, *raters = await seed_users(3)
+        async with AsyncSessionLocal() as db:
+            posts = [Post(owner_id=owner.id, title=f"batch {i}", content="batch post") for i in range(2)]
+            db.add_all(posts)
+            await db.flush()
+            db.add(Media(post_id=posts[0].id, url=f"https://example.com/{posts[0].id}.jpg", media_type="image"))
+            comment = Comment(user_id=owner.id, post_id=posts[0].id, content="batch comment")
+            db.add(comment)
+            await db.flush()
+            for rater, score in zip(raters, (6, 8)):
+                db.add(Rating(user_id=rater.id, post_id=posts[0].id, score=score))
+                db.add(Rating(user_id=rater.id, comment_id=comment.id, score=score - 4))
+            await db.commit()
+            return [p.id for p in posts], comment.id
+    return seed_posts
+
+async def test_batch_reads_keep_request_order_and_skip_missing(query_budget, seed):
+    (rated, plain), comment_id = await seed()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/posts", params={"ids": [plain, 999999999, rated, plain]})
+        assert resp.status_code == 200
+        posts = resp.json()
+        assert [p["id"] for p in posts] == [plain, rated]
+        assert posts[0]["media"] == [] and posts[0]["rating_count"] == 0
+        assert posts[1]["media_urls"] == [f"https://example.com/{rated}.jpg"]
+        assert (posts[1]["rating_average"], posts[1]["rating_count"]) == (7.0, 2)
+
+        resp = await ac.get("/comments", params={"ids": [comment_id, 999999999]})
+        assert [(c["id"], c["rating_average"], c["rating_count"]) for c in resp.json()] == [(comment_id, 3.0, 2)]
+
+        resp = await ac.get("/ratings/summary", params={"targets": [f"post:{rated}", f"comment:{comment_id}", "post:999999999", f"post:{rated}"]})
+        assert resp.json() == [
+            {"target": f"post:{rated}", "average": 7.0, "count": 2},
+            {"target": f"comment:{comment_id}", "average": 3.0, "count": 2},
+            {"target": "post:999999999", "average": 0.0, "count": 0},
+        ]
+
+        assert (await ac.get("/ratings/summary", params={"targets": ["user:1"]})).status_code == 422
+        assert (await ac.get("/posts", params={"ids": list(range(101))})).status_code == 422
+
+    query_budget.assert_within("GET /posts", 3)
+    query_budget.assert_within("GET /comments", 3)
+    query_budget.assert_within("GET /ratings/summary", 3)
+
+async def test_rating_summaries_do_not_expose_hidden_lowkeys(seed_users):
+    (owner,) = await seed_users(1)
+    async with AsyncSessionLocal() as db:
+        lowkey = Lowkey(owner_id=owner.id, visibility="followers", media_url=f"https://example.com/{uuid.uuid4().hex}.jpg", media_type="image", expires_at=datetime.now(timezone.utc) + timedelta(hours=1))
+        db.add(lowkey)
+        await db.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/ratings/summary", params={"targets": [f"lowkey:{lowkey.id}"]})
+        assert resp.status_code == 422
@@ -0,0 +1,126 @@
+import asyncio, sys
+from array import array
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import delete
+
+from ratemate_app.main import app
+from ratemate_app.db.session import AsyncSessionLocal
+from ratemate_app.models.user import User
+from ratemate_app.services.follow import get_follow_counts, follow_users, follow_user, unfollow_user
+from ratemate_app.services.follow_graph import intersect_sorted
+from ratemate_app.db.session import commit
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+async def counts(user_id: int) -> tuple[int, int]:
+    async with AsyncSessionLocal() as db:
+        return tuple(await get_follow_counts(db, user_id))
+
+async def test_bulk_follow_reports_an_outcome_per_target(seed_users, auth_headers):
+    me, a, b, gone = await seed_users(4)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.id == gone.id))
+        await db.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/follows/bulk", json={"user_ids": [a.id]}, headers=auth_headers(me))
+        assert resp.status_code == 200
+        assert resp.json() == [{"user_id": a.id, "status": "followed"}]
+
+        resp = await ac.post("/follows/bulk", json={"user_ids": [a.id, b.id, b.id, me.id, gone.id]}, headers=auth_headers(me))
+        assert resp.status_code == 200
+        assert {r["user_id"]: r["status"] for r in resp.json()} == {
+            a.id: "already_following",
+            b.id: "followed",
+            me.id: "self",
+            gone.id: "not_found",
+        }
+
+        assert await counts(me.id) == (0, 2)
+        assert await counts(a.id) == (1, 0)
+        assert await counts(b.id) == (1, 0)
+
+        resp = await ac.request("DELETE", "/follows/bulk", json={"user_ids": [a.id, gone.id]}, headers=auth_headers(me))
+        assert resp.status_code == 200
+        assert {r["user_id"]: r["status"] for r in resp.json()} == {a.id: "unfollowed", gone.id: "not_following"}
+
+        assert await counts(me.id) == (0, 1)
+        assert await counts(a.id) == (0, 0)
+
+async def test_follow_lists_page_newest_first_with_counts(seed_users, auth_headers):
+    me, a, b, c = await seed_users(4)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for target in (a, b, c):
+            assert (await ac.post(f"/follows/{target.id}", headers=auth_headers(me))).status_code == 201
+
+        resp = await ac.get("/follows/me/following", params={"limit": 2}, headers=auth_headers(me))
+        page = resp.json()
+        assert [u["id"] for u in page["items"]] == [c.id, b.id]
+        assert page["items"][0] == {"id": c.id, "username": c.username}
+        assert page["next_cursor"] is not None
+
+        resp = await ac.get("/follows/me/following", params={"limit": 2, "cursor": page["next_cursor"]}, headers=auth_headers(me))
+        page = resp.json()
+        assert [u["id"] for u in page["items"]] == [a.id]
+        assert page["next_cursor"] is None
+
+        resp = await ac.get("/follows/me/followers", headers=auth_headers(a))
+        assert resp.json() == {"items": [{"id": me.id, "username": me.username}], "next_cursor": None}
+
+        resp = await ac.get(f"/follows/{me.id}/counts")
+        assert resp.json() == {"follower_count": 0, "following_count": 3}
+
+async def test_suggestions_rank_friends_of_friends_and_mutuals_intersect(seed_users, auth_headers):
+    me, a, b, x, y, other = await seed_users(6)
+    async with AsyncSessionLocal() as db:
+        for follower, targets in ((me, [a, b]), (a, [x, y]), (b, [x, me]), (other, [a, x])):
+            await follow_users(db, follower.id, [t.id for t in targets])
+        await commit(db)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/follows/suggestions", headers=auth_headers(me))
+        assert [(s["id"], s["mutual_count"]) for s in resp.json()] == [(x.id, 2), (y.id, 1)]
+
+        resp = await ac.get(f"/follows/common_with/{other.id}", headers=auth_headers(me))
+        assert resp.json() == [{"id": a.id, "username": a.username}]
+
+async def test_intersect_sorted_handles_both_strategies():
+    assert intersect_sorted(array("q", [1, 3, 5, 7]), array("q", [2, 3, 7, 9])) == [3, 7]
+    assert intersect_sorted(array("q", list(range(0, 1000, 2))), array("q", [4, 5, 998])) == [4, 998]
+    assert intersect_sorted(array("q"), array("q", [1])) == []
+
+async def test_bulk_follow_rejects_too_many_targets(monkeypatch, seed_users, auth_headers):
+    from ratemate_app.core.config import settings
+
+    monkeypatch.setattr(settings, "FOLLOW_BULK_MAX_TARGETS", 2)
+    (me,) = await seed_users(1)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/follows/bulk", json={"user_ids": [1, 2, 3]}, headers=auth_headers(me))
+        assert resp.status_code == 400
+
+async def test_crossing_follows_do_not_deadlock_on_the_counters(seed_users):
+    a, b = await seed_users(2)
+
+    async def toggle(follower: User, followed: User, follow: bool) -> None:
+        async with AsyncSessionLocal() as db:
+            if follow:
+                await follow_user(db, follower.id, followed.id)
+            else:
+                await unfollow_user(db, follower.id, followed.id)
+            await commit(db)
+
+    for follow in (True, False) * 10:
+        await asyncio.gather(toggle(a, b, follow), toggle(b, a, follow))
+        expected = (1, 1) if follow else (0, 0)
+        assert await counts(a.id) == expected
+        assert await counts(b.id) == expected
@@ -0,0 +1,61 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from ratemate_app.main import app
+from ratemate_app.db.session import AsyncSessionLocal
+from ratemate_app.models.user import User
+from ratemate_app.models.post import Post
+from ratemate_app.models.rating import Rating
+from ratemate_app.services.feed import score_post
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+@pytest.fixture
+def seed_post(make_user):
+    async def seed(owner: User, scores: tuple[int, ...] = ()) -> int:
+        async with AsyncSessionLocal() as db:
+            post = Post(owner_id=owner.id, title="feed", content="feed post")
+            db.add(post)
+            await db.flush()
+            for score in scores:
+                rater = make_user()
+                db.add(rater)
+                await db.flush()
+                db.add(Rating(user_id=rater.id, post_id=post.id, score=score))
+            await db.commit()
+            return post.id
+    return seed
+
+async def test_score_prefers_recent_and_well_rated_posts():
+    now = datetime.now(timezone.utc)
+    assert score_post(now, 5.0, 3, now) > score_post(now - timedelta(hours=12), 5.0, 3, now)
+    assert score_post(now, 9.0, 3, now) > score_post(now, 4.0, 3, now)
+    assert score_post(now, 9.0, 20, now) > score_post(now, 9.0, 1, now)
+
+async def test_home_feed_ranks_followed_posts_and_refreshes_on_follow(seed_users, seed_post, auth_headers):
+    me, a, b = await seed_users(3)
+    plain = await seed_post(a)
+    rated = await seed_post(a, scores=(10, 10, 9))
+    other = await seed_post(b)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/posts/feed", headers=auth_headers(me))).json() == []
+
+        assert (await ac.post(f"/follows/{a.id}", headers=auth_headers(me))).status_code == 201
+        items = (await ac.get("/posts/feed", headers=auth_headers(me))).json()
+        assert [item["id"] for item in items] == [rated, plain]
+        assert items[0]["rating_count"] == 3
+        assert items[0]["score"] > items[1]["score"]
+
+        assert (await ac.post(f"/follows/{b.id}", headers=auth_headers(me))).status_code == 201
+        items = (await ac.get("/posts/feed", headers=auth_headers(me))).json()
+        assert {item["id"] for item in items} == {plain, rated, other}
+
+        items = (await ac.get("/posts/feed", params={"limit": 1, "offset": 1}, headers=auth_headers(me))).json()
+        assert len(items) == 1
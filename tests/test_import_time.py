@@ -0,0 +1,31 @@
+import os, subprocess, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+LAZY_PACKAGES = ("azure", "pyinstrument", "redis")
+
+def import_times(module: str) -> dict[str, int]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+def test_app_import_skips_optional_sdks_and_stays_within_budget():
+    times = import_times("ratemate_app.main")
+
+    loaded = sorted(name for name in times if name.split(".")[0] in LAZY_PACKAGES)
+    assert not loaded, f"optional SDKs imported at startup: {loaded}"
+
+    elapsed_ms = times["ratemate_app.main"] / 1000
+    assert elapsed_ms < IMPORT_BUDGET_MS, f"ratemate_app.main import took {elapsed_ms:.0f} ms, budget is {IMPORT_BUDGET_MS:.0f} ms"
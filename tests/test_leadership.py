@@ -0,0 +1,101 @@
+import sys, asyncio, random
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from ratemate_app.core.leadership import LeaderElection, background_leader
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+class FlakyConnection:
+    def __init__(self, engine):
+        self.engine = engine
+        self.invalidated = False
+        self.closed = False
+
+    async def execute(self, statement, params=None):
+        if self.engine.down:
+            raise ConnectionError("server closed the connection")
+        return self
+
+    def scalar_one(self):
+        return True
+
+    async def commit(self):
+        pass
+
+    async def invalidate(self):
+        self.invalidated = True
+
+    async def close(self):
+        self.closed = True
+
+
+class FlakyEngine:
+    def __init__(self):
+        self.down = False
+        self.connections: list[FlakyConnection] = []
+
+    async def connect(self):
+        if self.down:
+            raise ConnectionError("could not connect to server")
+        conn = FlakyConnection(self)
+        self.connections.append(conn)
+        return conn
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+def idle_job(started: list):
+    async def job():
+        started.append(1)
+        await asyncio.Event().wait()
+    return job
+
+async def test_leader_steps_down_when_the_lock_connection_fails():
+    started = []
+    election = LeaderElection(FlakyEngine(), {"idle": idle_job(started)}, interval=0.01)
+    election.start()
+    try:
+        await wait_for(lambda: election.is_leader and started)
+        assert background_leader.value() == 1
+        job = election._tasks[0]
+        conn = election.engine.connections[0]
+
+        election.engine.down = True
+        await wait_for(lambda: conn.closed)
+
+        assert job.cancelled()
+        assert conn.invalidated
+        assert not election.is_leader
+        assert background_leader.value() == 0
+
+        election.engine.down = False
+        await wait_for(lambda: election.is_leader)
+        assert len(election.engine.connections) == 2
+    finally:
+        await election.stop()
+    assert background_leader.value() == 0
+
+async def test_only_one_worker_holds_the_advisory_lock(fresh_engine):
+    key = random.randint(10**8, 10**9)
+    first = LeaderElection(fresh_engine, {"idle": idle_job([])}, lock_key=key)
+    second = LeaderElection(fresh_engine, {"idle": idle_job([])}, lock_key=key)
+    try:
+        await first._try_acquire()
+        await second._try_acquire()
+        assert first.is_leader
+        assert not second.is_leader
+
+        await first.stop()
+        await second._try_acquire()
+        assert second.is_leader
+    finally:
+        await first.stop()
+        await second.stop()
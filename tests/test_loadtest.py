@@ -0,0 +1,37 @@
+import sys
+from argparse import Namespace
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from benchmarks.loadtest import MIXES, SCENARIOS, percentile, run, summarize
+from ratemate_app.core.config import settings
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+async def test_percentile_and_summary():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+    report = summarize({"GET /a": [0.002, 0.004]}, {"GET /a": 1, "GET /b": 2}, elapsed=2.0)
+    assert report["routes"]["GET /a"] == {"count": 2, "errors": 1, "rps": 1.0, "mean_ms": 3.0, "p50_ms": 2.0, "p95_ms": 4.0, "p99_ms": 4.0}
+    assert report["routes"]["GET /b"]["count"] == 0
+    assert report["total"]["errors"] == 3
+
+async def test_every_mix_names_known_scenarios():
+    for weights in MIXES.values():
+        assert set(weights) <= set(SCENARIOS)
+
+async def test_social_mix_runs_without_errors(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", settings.RESPONSE_CACHE_ENABLED)
+    args = Namespace(mix="social", users=40, follows_per_user=5, posts_per_user=2, chats=4, seed=7,
+                     concurrency=4, duration=1.0, warmup=0.2, no_response_cache=False, keep=False)
+
+    report = await run(args)
+
+    assert report["total"]["count"] > 0
+    assert report["total"]["errors"] == 0, {route: stats["errors"] for route, stats in report["routes"].items() if stats["errors"]}
+    assert report["seed"]["users"] == 40
@@ -0,0 +1,148 @@
+import asyncio, sys, uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select, delete
+
+from ratemate_app.main import app
+from ratemate_app.core.config import settings
+from ratemate_app.db.session import engine, AsyncSessionLocal, commit
+from ratemate_app.models.user import User
+from ratemate_app.models.follow import Follow
+from ratemate_app.models.lowkey import Lowkey
+from ratemate_app.models.timeline import LowkeyTimeline
+from ratemate_app.services.follow import follow_user, unfollow_user
+from ratemate_app.services.lowkey import list_following_active_lowkeys, expire_lowkeys, next_lowkey_expiry
+from ratemate_app.services import follow_graph
+from ratemate_app.services.follow_graph import get_followees, run_follow_change_listener
+from ratemate_app.services.timeline import fan_out_lowkey
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+async def follow(follower_id: int, followed_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await follow_user(db, follower_id, followed_id)
+        await commit(db)
+
+async def post_lowkey(owner_id: int, visibility: str = "public", ttl: timedelta = timedelta(hours=1)) -> tuple[int, bool]:
+    async with AsyncSessionLocal() as db:
+        lowkey = Lowkey(owner_id=owner_id, visibility=visibility, media_url=f"https://example.com/{uuid.uuid4().hex}.jpg", media_type="image", expires_at=datetime.now(timezone.utc) + ttl)
+        db.add(lowkey)
+        await db.flush()
+        await fan_out_lowkey(db, lowkey)
+        await commit(db)
+        return lowkey.id, lowkey.fanned_out
+
+async def feed_ids(user_id: int) -> list[int]:
+    async with AsyncSessionLocal() as db:
+        return [row["id"] for row in await list_following_active_lowkeys(db, user_id)]
+
+async def test_fan_out_pushes_to_followers_and_follows_backfill(seed_users):
+    owner, follower, late, stranger = [u.id for u in await seed_users(4)]
+    await follow(follower, owner)
+
+    lowkey_id, fanned_out = await post_lowkey(owner)
+    assert fanned_out
+    assert await feed_ids(follower) == [lowkey_id]
+    assert await feed_ids(stranger) == []
+
+    await follow(late, owner)
+    assert await feed_ids(late) == [lowkey_id]
+
+    async with AsyncSessionLocal() as db:
+        await unfollow_user(db, follower, owner)
+        await commit(db)
+    assert await feed_ids(follower) == []
+
+async def test_large_accounts_are_pulled_at_read_time(monkeypatch, seed_users):
+    monkeypatch.setattr(settings, "LOWKEY_FANOUT_MAX_FOLLOWERS", 0)
+    owner, follower = [u.id for u in await seed_users(2)]
+    await follow(follower, owner)
+
+    older_id, _ = await post_lowkey(owner)
+    newer_id, fanned_out = await post_lowkey(owner)
+    assert not fanned_out
+    assert await feed_ids(follower) == [newer_id, older_id]
+
+    async with AsyncSessionLocal() as db:
+        pushed = await db.execute(select(LowkeyTimeline.id).where(LowkeyTimeline.user_id == follower))
+        assert pushed.first() is None
+
+async def test_expiry_deactivates_due_lowkeys_and_prunes_timelines(seed_users):
+    owner, follower = [u.id for u in await seed_users(2)]
+    await follow(follower, owner)
+    live_id, _ = await post_lowkey(owner)
+    due_id, _ = await post_lowkey(owner, ttl=timedelta(seconds=-1))
+
+    async with AsyncSessionLocal() as db:
+        assert await expire_lowkeys(db, batch_size=2) >= 1
+        live, due = await db.get(Lowkey, live_id), await db.get(Lowkey, due_id)
+        assert live.is_active
+        assert not due.is_active
+        pruned = await db.execute(select(LowkeyTimeline.lowkey_id).where(LowkeyTimeline.user_id == follower))
+        assert pruned.scalars().all() == [live_id]
+        assert await next_lowkey_expiry(db) <= live.expires_at
+
+async def test_followers_only_lowkey_checks_the_follow_table(seed_users, auth_headers):
+    owner, follower, stranger = [u.id for u in await seed_users(3)]
+    await follow(follower, owner)
+    lowkey_id, _ = await post_lowkey(owner, visibility="followers")
+
+    async with AsyncSessionLocal() as db:
+        names = {u.id: u.username for u in (await db.execute(select(User).where(User.id.in_([owner, follower, stranger])))).scalars()}
+        assert owner in await get_followees(db, follower)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for user_id, expected in ((owner, 200), (follower, 200), (stranger, 403)):
+            resp = await ac.get(f"/lowkeys/{lowkey_id}", headers=auth_headers(names[user_id]))
+            assert resp.status_code == expected
+
+        # an unfollow made elsewhere leaves this worker's cached graph stale, access must still be revoked
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Follow).where(Follow.follower_id == follower, Follow.followed_id == owner))
+            await db.commit()
+            assert owner in await get_followees(db, follower)
+
+        resp = await ac.get(f"/lowkeys/{lowkey_id}", headers=auth_headers(names[follower]))
+        assert resp.status_code == 403
+
+async def wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.02)
+
+async def test_listening_worker_serves_visibility_from_the_graph_and_hears_remote_unfollows(seed_users, auth_headers):
+    owner, follower = [u.id for u in await seed_users(2)]
+    await follow(follower, owner)
+    lowkey_id, _ = await post_lowkey(owner, visibility="followers")
+    async with AsyncSessionLocal() as db:
+        name = (await db.execute(select(User.username).where(User.id == follower))).scalar_one()
+
+    listener = asyncio.create_task(run_follow_change_listener(engine))
+    try:
+        await wait_until(lambda: follow_graph._listening)
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            resp = await ac.get(f"/lowkeys/{lowkey_id}", headers=auth_headers(name))
+            assert resp.status_code == 200
+            assert follow_graph._followees.get(follower) is not None
+            assert lowkey_id in await feed_ids(follower)
+
+            # a plain commit skips this worker's on_commit cache updates, as on another worker only the NOTIFY reaches us
+            async with AsyncSessionLocal() as db:
+                await unfollow_user(db, follower, owner)
+                await db.commit()
+            await wait_until(lambda: follow_graph._followees.get(follower) is None)
+
+            resp = await ac.get(f"/lowkeys/{lowkey_id}", headers=auth_headers(name))
+            assert resp.status_code == 403
+            assert lowkey_id not in await feed_ids(follower)
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+    assert not follow_graph._listening
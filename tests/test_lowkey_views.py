@@ -0,0 +1,79 @@
+import sys
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from sqlalchemy import delete, select
+
+from ratemate_app.db.session import AsyncSessionLocal
+from ratemate_app.models.user import User
+from ratemate_app.models.lowkey import Lowkey, LowkeyView
+from ratemate_app.services import lowkey_views
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+@pytest.fixture(autouse=True)
+def fresh_view_buffer(monkeypatch):
+    monkeypatch.setattr(lowkey_views, "_pending", {})
+    monkeypatch.setattr(lowkey_views, "_pending_size", 0)
+    monkeypatch.setattr(lowkey_views, "_seen", OrderedDict())
+
+@pytest.fixture
+def seed(seed_users):
+    async def seed_lowkey(viewer_count: int) -> tuple[int, list[int]]:
+        owner, *viewers = await seed_users(viewer_count + 1)
+        async with AsyncSessionLocal() as db:
+            lowkey = Lowkey(owner_id=owner.id, media_url="https://example.com/lk.jpg", media_type="image", expires_at=datetime.now(timezone.utc) + timedelta(hours=1))
+            db.add(lowkey)
+            await db.commit()
+            return lowkey.id, [u.id for u in viewers]
+    return seed_lowkey
+
+async def stored_views(lowkey_id: int) -> tuple[int, set[int]]:
+    async with AsyncSessionLocal() as db:
+        lowkey = await db.get(Lowkey, lowkey_id)
+        viewers = (await db.execute(select(LowkeyView.viewer_id).where(LowkeyView.lowkey_id == lowkey_id))).scalars().all()
+        return lowkey.view_count, set(viewers)
+
+async def test_flush_counts_each_viewer_once(seed):
+    lowkey_id, (a, b) = await seed(2)
+
+    for viewer in (a, b, a):
+        lowkey_views.record_view(lowkey_id, viewer)
+    async with AsyncSessionLocal() as db:
+        assert lowkey_views.get_live_view_count(await db.get(Lowkey, lowkey_id)) == 2
+        assert await lowkey_views.flush_views(db) == 2
+
+    assert await stored_views(lowkey_id) == (2, {a, b})
+    assert lowkey_views._pending == {}
+
+async def test_flush_drops_views_of_a_deleted_lowkey(seed):
+    lowkey_id, (a,) = await seed(1)
+    gone_id, (b,) = await seed(1)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Lowkey).where(Lowkey.id == gone_id))
+        await db.commit()
+
+    lowkey_views.record_view(lowkey_id, a)
+    lowkey_views.record_view(gone_id, b)
+    async with AsyncSessionLocal() as db:
+        assert await lowkey_views.flush_views(db) == 1
+
+    assert await stored_views(lowkey_id) == (1, {a})
+    assert lowkey_views._pending == {}
+
+async def test_flush_drops_views_from_a_deleted_viewer(seed):
+    lowkey_id, (a, b) = await seed(2)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.id == b))
+        await db.commit()
+
+    lowkey_views.record_view(lowkey_id, a)
+    lowkey_views.record_view(lowkey_id, b)
+    async with AsyncSessionLocal() as db:
+        assert await lowkey_views.flush_views(db) == 1
+
+    assert await stored_views(lowkey_id) == (1, {a})
+    assert lowkey_views._pending == {}
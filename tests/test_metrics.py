@@ -0,0 +1,88 @@
+import sys, uuid
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from ratemate_app.main import app
+from ratemate_app.core import rate_limit, response_cache
+from ratemate_app.core.config import settings
+from ratemate_app.core.instrumentation import http_requests_total, http_request_duration, http_request_db_queries
+from ratemate_app.db.session import AsyncSessionLocal
+from ratemate_app.models.post import Post
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+POST_ROUTE = {"method": "GET", "route": "/posts/{post_id}"}
+
+@pytest.fixture
+def seed_post(seed_users):
+    async def seed() -> int:
+        (owner,) = await seed_users(1)
+        async with AsyncSessionLocal() as db:
+            post = Post(owner_id=owner.id, title="metrics", content="metrics post")
+            db.add(post)
+            await db.commit()
+            return post.id
+    return seed
+
+async def test_requests_are_labelled_by_route_template(seed_post):
+    post_id = await seed_post()
+    ok_before = http_requests_total.value(**POST_ROUTE, status=200)
+    missing_before = http_requests_total.value(**POST_ROUTE, status=404)
+    unmatched_before = http_requests_total.value(method="GET", route="unmatched", status=404)
+    timed_before = http_request_duration.count(**POST_ROUTE)
+    db_before = http_request_db_queries.count(**POST_ROUTE)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get(f"/posts/{post_id}")).status_code == 200
+        assert (await ac.get("/posts/999999999")).status_code == 404
+        assert (await ac.get(f"/no-such-route/{uuid.uuid4().hex}")).status_code == 404
+
+    assert http_requests_total.value(**POST_ROUTE, status=200) == ok_before + 1
+    assert http_requests_total.value(**POST_ROUTE, status=404) == missing_before + 1
+    assert http_requests_total.value(method="GET", route="unmatched", status=404) == unmatched_before + 1
+    assert http_request_duration.count(**POST_ROUTE) == timed_before + 2
+    assert http_request_db_queries.count(**POST_ROUTE) == db_before + 2
+
+async def test_admin_metrics_render_prometheus_text(admin_credentials):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/admin/metrics", headers=admin_credentials["headers"])).status_code == 401
+
+        resp = await ac.get("/admin/metrics", **admin_credentials)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_request_duration_seconds histogram" in resp.text
+        assert "# TYPE http_requests_total counter" in resp.text
+
+async def test_short_circuited_responses_are_counted(monkeypatch, admin_credentials, seed_post):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN", "1/60")
+    monkeypatch.setattr(rate_limit, "_backend", None)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(response_cache, "_backend", None)
+    login = {"method": "POST", "route": "/auth/login"}
+    post_id = await seed_post()
+    limited_before = http_requests_total.value(**login, status=429)
+    not_modified_before = http_requests_total.value(**POST_ROUTE, status=304)
+
+    transport = ASGITransport(app=app, client=("203.0.113.20", 40000))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        body = {"username": f"mt_{uuid.uuid4().hex[:10]}", "password": "wrong-password"}
+        assert (await ac.post("/auth/login", json=body)).status_code == 401
+        assert (await ac.post("/auth/login", json=body)).status_code == 429
+
+        etag = (await ac.get(f"/posts/{post_id}")).headers["etag"]
+        assert (await ac.get(f"/posts/{post_id}", headers={"If-None-Match": etag})).status_code == 304
+
+        text = (await ac.get("/admin/metrics", **admin_credentials)).text
+
+    assert http_requests_total.value(**login, status=429) == limited_before + 1
+    assert http_requests_total.value(**POST_ROUTE, status=304) == not_modified_before + 1
+    assert 'http_requests_total{method="POST",route="/auth/login",status="429"}' in text
+    assert 'http_requests_total{method="GET",route="/posts/{post_id}",status="304"}' in text
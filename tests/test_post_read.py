@@ -0,0 +1,114 @@
+import os, sys, time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+
+from ratemate_app.main import app
+from ratemate_app.db.session import engine, AsyncSessionLocal
+from ratemate_app.models.post import Post
+from ratemate_app.models.media import Media
+from ratemate_app.models.rating import Rating
+from ratemate_app.services.post import get_post_for_read
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+POST_READ_BUDGET_MS = float(os.getenv("POST_READ_BUDGET_MS", "20"))
+
+@pytest.fixture
+def seed_post(seed_users):
+    async def seed(media_count: int = 3, scores: tuple[int, ...] = (4, 8)) -> int:
+        owner, *raters = await seed_users(1 + len(scores))
+        async with AsyncSessionLocal() as db:
+            post = Post(owner_id=owner.id, title="read path", content="post with media")
+            db.add(post)
+            await db.flush()
+
+            for i in range(media_count):
+                db.add(Media(post_id=post.id, url=f"https://example.com/{post.id}/{i}.jpg", media_type="image"))
+
+            for rater, score in zip(raters, scores):
+                db.add(Rating(user_id=rater.id, post_id=post.id, score=score))
+
+            await db.commit()
+            return post.id
+    return seed
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+async def test_post_read_loads_media_and_rating_in_one_statement(seed_post):
+    post_id = await seed_post()
+
+    async with AsyncSessionLocal() as db:
+        with StatementCounter() as counter:
+            post, rating_average, rating_count = await get_post_for_read(db, post_id, include_media=True, include_rating=True)
+            urls = sorted(m.url for m in post.media)
+
+    assert counter.count == 1
+    assert len(urls) == 3
+    assert rating_average == 6.0
+    assert rating_count == 2
+
+async def test_get_post_endpoint_returns_media(seed_post):
+    post_id = await seed_post(media_count=2)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get(f"/posts/{post_id}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data["media"]) == 2
+        assert data["media_urls"] == [m["url"] for m in data["media"]]
+        assert "rating_average" not in data
+
+        resp = await ac.get(f"/posts/{post_id}", params={"include_rating": True, "include_media": False})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["media"] == []
+        assert data["rating_count"] == 2
+
+        resp = await ac.get("/posts/999999999")
+        assert resp.status_code == 404
+
+async def test_post_read_benchmark(seed_post):
+    post_id = await seed_post(media_count=5)
+    rounds = 200
+
+    async with AsyncSessionLocal() as db:
+        await get_post_for_read(db, post_id, include_media=True, include_rating=True)
+        with StatementCounter() as counter:
+            started = time.perf_counter()
+            for _ in range(rounds):
+                db.expunge_all()
+                await get_post_for_read(db, post_id, include_media=True, include_rating=True)
+            elapsed_ms = (time.perf_counter() - started) * 1000 / rounds
+
+    assert counter.count == rounds, f"post read ran {counter.count} statements over {rounds} rounds, budget is 1 per read"
+    assert elapsed_ms < POST_READ_BUDGET_MS, f"post read took {elapsed_ms:.2f} ms/read over {rounds} rounds, budget is {POST_READ_BUDGET_MS:g} ms"
+
+async def test_read_endpoints_stay_within_query_budget(query_budget, seed_post):
+    post_id = await seed_post(media_count=2)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get(f"/posts/{post_id}")).status_code == 200
+        assert (await ac.get("/posts", params={"ids": [post_id, post_id + 1]})).status_code == 200
+        assert (await ac.get(f"/comments/by_post/{post_id}")).status_code == 200
+
+    query_budget.assert_within("GET /posts/{post_id}", 1)
+    query_budget.assert_within("GET /posts", 3)
+    query_budget.assert_clean()
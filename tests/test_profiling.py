@@ -0,0 +1,71 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from ratemate_app.main import app
+from ratemate_app.core.config import settings
+from ratemate_app.core.profiling import ProfileBuffer, RequestProfile, profile_buffer
+from ratemate_app.db.session import AsyncSessionLocal
+from ratemate_app.models.post import Post
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+@pytest.fixture
+def seed_post(fresh_engine, seed_users):
+    async def seed() -> int:
+        (owner,) = await seed_users(1)
+        async with AsyncSessionLocal() as db:
+            post = Post(owner_id=owner.id, title="profiled", content="profiled post")
+            db.add(post)
+            await db.commit()
+            return post.id
+    return seed
+
+def make_profile(buffer: ProfileBuffer) -> RequestProfile:
+    return RequestProfile(
+        id=buffer.next_id(), method="GET", route="/posts/{post_id}", path="/posts/1", status=200,
+        duration_ms=1.0, db_queries=1, db_ms=0.5, reason="sampled", captured_at=datetime.now(timezone.utc), session=None,
+    )
+
+async def test_profile_buffer_keeps_the_newest_profiles():
+    buffer = ProfileBuffer(maxlen=2)
+    first, second, third = (make_profile(buffer) for _ in range(3))
+    for profile in (first, second, third):
+        buffer.add(profile)
+
+    assert [p.id for p in buffer.list()] == [third.id, second.id]
+    assert buffer.get(first.id) is None
+    assert buffer.get(third.id) is third
+    assert third.summary()["captured_at"].endswith("Z")
+
+    buffer.clear()
+    assert buffer.list() == []
+
+async def test_sampled_requests_are_readable_from_admin(monkeypatch, admin_credentials, seed_post):
+    pytest.importorskip("pyinstrument")
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    post_id = await seed_post()
+    profile_buffer.clear()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get(f"/posts/{post_id}")).status_code == 200
+
+        profiles = (await ac.get("/admin/profiles", **admin_credentials)).json()
+        assert len(profiles) == 1
+        profile = profiles[0]
+        assert (profile["route"], profile["path"], profile["status"], profile["reason"]) == ("/posts/{post_id}", f"/posts/{post_id}", 200, "sampled")
+        assert profile["db_queries"] >= 1
+
+        resp = await ac.get(f"/admin/profiles/{profile['id']}", **admin_credentials)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+
+        assert (await ac.get("/admin/profiles/999999999", **admin_credentials)).status_code == 404
+        assert (await ac.delete("/admin/profiles", **admin_credentials)).json() == {"success": True}
+        assert (await ac.get("/admin/profiles", **admin_credentials)).json() == []
@@ -0,0 +1,72 @@
+import sys, uuid
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from ratemate_app.main import app
+from ratemate_app.core import rate_limit
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+@pytest.fixture(autouse=True)
+def tight_login_limit(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_LOGIN", "2/60")
+    monkeypatch.setattr(rate_limit, "_backend", None)
+
+def login_body() -> dict:
+    return {"username": f"rl_{uuid.uuid4().hex[:10]}", "password": "wrong-password"}
+
+async def test_login_is_limited_per_client_with_retry_after():
+    transport = ASGITransport(app=app, client=("203.0.113.7", 40000))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for _ in range(2):
+            assert (await ac.post("/auth/login", json=login_body())).status_code == 401
+
+        resp = await ac.post("/auth/login", json=login_body())
+        assert resp.status_code == 429
+        assert resp.json() == {"detail": "Too many requests"}
+        assert 1 <= int(resp.headers["retry-after"]) <= 30
+
+    other = ASGITransport(app=app, client=("203.0.113.8", 40000))
+    async with AsyncClient(transport=other, base_url="http://test") as ac:
+        assert (await ac.post("/auth/login", json=login_body())).status_code == 401
+
+async def test_memory_bucket_refills_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    backend = rate_limit.MemoryRateLimitBackend(max_keys=10)
+
+    assert await backend.acquire("k", capacity=2, refill_per_second=0.5) == 0.0
+    assert await backend.acquire("k", capacity=2, refill_per_second=0.5) == 0.0
+    assert await backend.acquire("k", capacity=2, refill_per_second=0.5) == pytest.approx(2.0)
+
+    now[0] += 2.0
+    assert await backend.acquire("k", capacity=2, refill_per_second=0.5) == 0.0
+
+async def test_login_buckets_follow_the_forwarded_client_behind_a_trusted_proxy(monkeypatch):
+    from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+    # the same wrapping uvicorn applies with proxy_headers=True and forwarded_allow_ips from settings
+    monkeypatch.setattr(rate_limit.settings, "FORWARDED_ALLOW_IPS", "172.16.0.0/12")
+    proxied = ProxyHeadersMiddleware(app, trusted_hosts=rate_limit.settings.FORWARDED_ALLOW_IPS)
+
+    def forwarded(ip: str) -> dict:
+        return {"X-Forwarded-For": ip}
+
+    nginx = ASGITransport(app=proxied, client=("172.18.0.5", 40000))
+    async with AsyncClient(transport=nginx, base_url="http://test") as ac:
+        for _ in range(2):
+            assert (await ac.post("/auth/login", json=login_body(), headers=forwarded("198.51.100.1"))).status_code == 401
+        assert (await ac.post("/auth/login", json=login_body(), headers=forwarded("198.51.100.1"))).status_code == 429
+        assert (await ac.post("/auth/login", json=login_body(), headers=forwarded("198.51.100.2"))).status_code == 401
+
+    # an untrusted peer cannot pick its bucket by sending the header itself
+    direct = ASGITransport(app=proxied, client=("203.0.113.9", 40000))
+    async with AsyncClient(transport=direct, base_url="http://test") as ac:
+        for n in range(2):
+            assert (await ac.post("/auth/login", json=login_body(), headers=forwarded(f"198.51.100.{10 + n}"))).status_code == 401
+        assert (await ac.post("/auth/login", json=login_body(), headers=forwarded("198.51.100.12"))).status_code == 429
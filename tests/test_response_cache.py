@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from ratemate_app.main import app
+from ratemate_app.core import response_cache
+from ratemate_app.db.session import AsyncSessionLocal, commit
+from ratemate_app.models.post import Post
+from ratemate_app.services.ratings import set_post_rating
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+@pytest.fixture
+def seed_post(seed_users):
+    async def seed() -> int:
+        (owner,) = await seed_users(1)
+        async with AsyncSessionLocal() as db:
+            post = Post(owner_id=owner.id, title="cached", content="cached post")
+            db.add(post)
+            await db.commit()
+            return post.id
+    return seed
+
+@pytest.fixture(autouse=True)
+def memory_backend(monkeypatch):
+    monkeypatch.setattr(response_cache.settings, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache.settings, "RESPONSE_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(response_cache, "_backend", None)
+
+async def test_etag_revalidates_until_the_post_is_rated(seed_post, seed_users):
+    post_id = await seed_post()
+    url = f"/posts/{post_id}"
+    params = {"include_rating": True}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get(url, params=params)
+        assert resp.status_code == 200
+        etag = resp.headers["etag"]
+        assert resp.json()["rating_count"] == 0
+
+        resp = await ac.get(url, params=params, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+
+        resp = await ac.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
+
+        (rater,) = await seed_users(1)
+        async with AsyncSessionLocal() as db:
+            await set_post_rating(db, rater.id, post_id, 7)
+            await commit(db)
+
+        resp = await ac.get(url, params=params, headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
+        assert resp.json()["rating_count"] == 1
+
+        resp = await ac.get(url, params=params, headers={"If-None-Match": resp.headers["etag"]})
+        assert resp.status_code == 304
+
+async def test_invalidate_changes_the_rating_etag(seed_post):
+    post_id = await seed_post()
+    url = f"/posts/{post_id}/rating"
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        etag = (await ac.get(url)).headers["etag"]
+        assert (await ac.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+        await response_cache.invalidate(f"post:{post_id}:rating")
+
+        resp = await ac.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
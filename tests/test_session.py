@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from ratemate_app.db.session import AsyncSessionLocal, commit, on_commit, has_writes
+from ratemate_app.models.user import User
+
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.usefixtures("fresh_engine")]
+
+async def test_on_commit_callbacks_run_after_commit(make_user):
+    ran = []
+
+    async def record_async(value):
+        ran.append(value)
+
+    async with AsyncSessionLocal() as db:
+        user = make_user()
+        db.add(user)
+        await db.flush()
+        assert has_writes(db)
+        on_commit(db, ran.append, "sync")
+        on_commit(db, record_async, "async")
+        assert ran == []
+
+        await commit(db)
+        assert ran == ["sync", "async"]
+        assert not has_writes(db)
+
+        await db.delete(user)
+        await commit(db)
+        assert ran == ["sync", "async"]
+
+async def test_on_commit_callbacks_are_dropped_on_rollback(make_user):
+    ran = []
+
+    async with AsyncSessionLocal() as db:
+        user = make_user()
+        db.add(user)
+        await db.flush()
+        on_commit(db, ran.append, "rolled back")
+
+        await db.rollback()
+        assert not has_writes(db)
+
+        await commit(db)
+        assert ran == []
+        assert await db.get(User, user.id) is None
@@ -0,0 +1,38 @@
+import sys, asyncio, logging, time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from ratemate_app.core.watchdog import LoopWatchdog, event_loop_stalls_total, _quantile
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+def block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+async def test_watchdog_reports_a_stall_once_with_the_blocking_stack(caplog):
+    stalls_before = event_loop_stalls_total.value()
+    watchdog = LoopWatchdog(interval=0.01, stall_threshold=0.05, window=100)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+        with caplog.at_level(logging.WARNING, logger="ratemate_app.core.watchdog"):
+            block_the_loop(0.3)
+            await asyncio.sleep(0.1)
+    finally:
+        await watchdog.stop()
+
+    assert event_loop_stalls_total.value() == stalls_before + 1
+    stall_logs = [r.getMessage() for r in caplog.records if "Event loop blocked" in r.getMessage()]
+    assert len(stall_logs) == 1
+    assert "block_the_loop" in stall_logs[0]
+
+    quantiles = watchdog.lag_quantiles()
+    assert quantiles[0.99] >= 0.2
+
+async def test_quantile_picks_from_sorted_samples():
+    values = [float(i) for i in range(100)]
+    assert _quantile(values, 0.5) == 50.0
+    assert _quantile(values, 0.99) == 99.0
+    assert _quantile([0.25], 0.95) == 0.25